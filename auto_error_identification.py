@@ -5,6 +5,7 @@ import argparse
 from enum import Enum
 from pydantic import BaseModel
 from tau_bench.model_utils import default_api_from_args, API
+from tau_bench.checkpoint import read_checkpoint_records
 from tau_bench.envs.airline.tasks_test import TASKS as AIRLINE_TASKS
 from tau_bench.envs.retail.tasks_test import TASKS_TEST as RETAIL_TASKS
 from tau_bench.model_utils.args import api_parser
@@ -177,8 +178,7 @@ def fault_type_analysis(api: API, results: List[OriginalResult], max_concurrency
 def main() -> None:
     args = get_args()
     api = default_api_from_args(args)
-    with open(args.results_path, "r") as f:
-        results = json.load(f)
+    results = read_checkpoint_records(args.results_path)
     print(f"Loaded {len(results)} results")
     env = args.env
     if env == "airline":
@@ -69,6 +69,69 @@ def parse_args() -> RunConfig:
     parser.add_argument("--shuffle", type=int, default=0)
     parser.add_argument("--user-strategy", type=str, default="llm", choices=[item.value for item in UserStrategy])
     parser.add_argument("--few-shot-displays-path", type=str, help="Path to a jsonlines file containing few shot displays")
+    parser.add_argument(
+        "--checkpoint-fsync",
+        type=str,
+        default="never",
+        choices=["always", "never"],
+        help="Whether to fsync the checkpoint after every result (it is always flushed)",
+    )
+    parser.add_argument(
+        "--export-json",
+        action="store_true",
+        help="Also export the results as a pretty-printed JSON file next to the JSONL checkpoint",
+    )
+    parser.add_argument(
+        "--runner",
+        type=str,
+        default="thread",
+        choices=["thread", "async"],
+        help="Run episodes on a thread pool, or as asyncio tasks on one event loop (--max-concurrency bounds both)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to shard the (task, trial) pairs over, each running --max-concurrency episodes at a time",
+    )
+    parser.add_argument(
+        "--user-transcript-tokens",
+        type=int,
+        help="Token budget of the transcript sent to the supervisor of the verify and reflection user strategies, which keeps the instruction and the latest messages (full transcript if unset)",
+    )
+    parser.add_argument(
+        "--user-parallel-candidates",
+        action="store_true",
+        help="Generate and verify all the candidate responses of the verify user strategy at once, instead of one attempt after another",
+    )
+    parser.add_argument(
+        "--llm-transport",
+        type=str,
+        default="live",
+        choices=["live", "record", "replay"],
+        help="Call the LLMs, call them and record the responses to --llm-store, or replay the responses recorded there without network",
+    )
+    parser.add_argument(
+        "--llm-store",
+        type=str,
+        help="Directory of recorded LLM responses, for --llm-transport record or replay",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        help="Path to a SQLite file caching the responses to temperature 0 requests across runs",
+    )
+    parser.add_argument(
+        "--llm-cache-size-mb",
+        type=int,
+        default=1024,
+        help="Size of the LLM cache above which the least recently used responses are evicted",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        help="Path to the checkpoint of an interrupted run to finish (skips the finished task and trial pairs and appends to it)",
+    )
     args = parser.parse_args()
     print(args)
     return RunConfig(
@@ -89,7 +152,18 @@ def parse_args() -> RunConfig:
         seed=args.seed,
         shuffle=args.shuffle,
         user_strategy=args.user_strategy,
+        user_transcript_tokens=args.user_transcript_tokens,
+        user_parallel_candidates=args.user_parallel_candidates,
         few_shot_displays_path=args.few_shot_displays_path,
+        checkpoint_fsync=args.checkpoint_fsync,
+        export_json=args.export_json,
+        resume=args.resume,
+        runner=args.runner,
+        workers=args.workers,
+        llm_transport=args.llm_transport,
+        llm_store=args.llm_store,
+        llm_cache=args.llm_cache,
+        llm_cache_size_mb=args.llm_cache_size_mb,
     )
 
 
@@ -1,9 +1,10 @@
 # Copyright Sierra
 
 import abc
-from typing import Optional
+import asyncio
+from typing import Any, Dict, Optional
 from tau_bench.envs.base import Env
-from tau_bench.types import SolveResult
+from tau_bench.types import EnvResponse, SolveResult
 
 
 class Agent(abc.ABC):
@@ -12,3 +13,14 @@ class Agent(abc.ABC):
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
     ) -> SolveResult:
         raise NotImplementedError
+
+    async def asolve(
+        self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
+    ) -> SolveResult:
+        # agents without a native async implementation run in a worker thread
+        return await asyncio.to_thread(self.solve, env, task_index, max_num_steps)
+
+
+def merge_info(info: Dict[str, Any], env_response: EnvResponse) -> Dict[str, Any]:
+    # later steps overwrite the fields of earlier ones
+    return {**info, **env_response.info.model_dump()}
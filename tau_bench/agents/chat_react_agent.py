@@ -1,12 +1,14 @@
 # Copyright Sierra
 
 import json
-from litellm import completion
+from litellm import ModelResponse
+from tau_bench.llm import Role, acompletion, completion
 
-from tau_bench.agents.base import Agent
+from tau_bench.agents.base import Agent, merge_info
 from tau_bench.envs.base import Env
 from tau_bench.types import (
     Action,
+    EnvResponse,
     SolveResult,
     RESPOND_ACTION_NAME,
     RESPOND_ACTION_FIELD_NAME,
@@ -34,15 +36,24 @@ class ChatReActAgent(Agent):
         self.use_reasoning = use_reasoning
         self.tools_info = tools_info
 
-    def generate_next_step(
-        self, messages: List[Dict[str, Any]]
-    ) -> Tuple[Dict[str, Any], Action, float]:
-        res = completion(
+    def initial_messages(self, observation: str) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": self.prompt},
+            {"role": "user", "content": observation},
+        ]
+
+    def request(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(
+            role=Role.AGENT,
             model=self.model,
             custom_llm_provider=self.provider,
             messages=messages,
             temperature=self.temperature,
         )
+
+    def parse_response(
+        self, res: ModelResponse
+    ) -> Tuple[Dict[str, Any], Action, float]:
         message = res.choices[0].message
         action_str = message.content.split("Action:")[-1].strip()
         try:
@@ -58,31 +69,30 @@ class ChatReActAgent(Agent):
         action = Action(name=action_parsed["name"], kwargs=action_parsed["arguments"])
         return message.model_dump(), action, res._hidden_params["response_cost"]
 
+    def generate_next_step(
+        self, messages: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Action, float]:
+        return self.parse_response(completion(**self.request(messages)))
+
+    async def agenerate_next_step(
+        self, messages: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Action, float]:
+        return self.parse_response(await acompletion(**self.request(messages)))
+
     def solve(
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
     ) -> SolveResult:
         response = env.reset(task_index=task_index)
         reward = 0.0
-        messages: List[Dict[str, Any]] = [
-            {"role": "system", "content": self.prompt},
-            {"role": "user", "content": response.observation},
-        ]
+        messages = self.initial_messages(response.observation)
         total_cost = 0.0
         info = {}
         for _ in range(max_num_steps):
             message, action, cost = self.generate_next_step(messages)
             response = env.step(action)
-            obs = response.observation
             reward = response.reward
-            info = {**info, **response.info.model_dump()}
-            if action.name != RESPOND_ACTION_NAME:
-                obs = "API output: " + obs
-            messages.extend(
-                [
-                    message,
-                    {"role": "user", "content": obs},
-                ]
-            )
+            info = merge_info(info, response)
+            messages.extend(step_messages(message, action, response))
             total_cost += cost
             if response.done:
                 break
@@ -92,6 +102,42 @@ class ChatReActAgent(Agent):
             info=info,
         )
 
+    async def asolve(
+        self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
+    ) -> SolveResult:
+        response = await env.areset(task_index=task_index)
+        reward = 0.0
+        messages = self.initial_messages(response.observation)
+        total_cost = 0.0
+        info = {}
+        for _ in range(max_num_steps):
+            message, action, cost = await self.agenerate_next_step(messages)
+            response = await env.astep(action)
+            reward = response.reward
+            info = merge_info(info, response)
+            messages.extend(step_messages(message, action, response))
+            total_cost += cost
+            if response.done:
+                break
+        return SolveResult(
+            messages=messages,
+            reward=reward,
+            info=info,
+        )
+
+
+def step_messages(
+    message: Dict[str, Any], action: Action, response: EnvResponse
+) -> List[Dict[str, Any]]:
+    """The agent message of a step and the user message that answers it, with the tool output if any."""
+    obs = response.observation
+    if action.name != RESPOND_ACTION_NAME:
+        obs = "API output: " + obs
+    return [
+        message,
+        {"role": "user", "content": obs},
+    ]
+
 
 REACT_INSTRUCTION = f"""
 # Instruction
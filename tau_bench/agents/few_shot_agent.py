@@ -1,8 +1,8 @@
 # Copyright Sierra
 
 import json
-import random
-from litellm import completion
+from tau_bench.llm import Role, completion
+from tau_bench.rng import get_rng
 from typing import List, Optional, Dict, Any
 
 from tau_bench.agents.base import Agent
@@ -35,7 +35,7 @@ class FewShotToolCallingAgent(Agent):
     def solve(
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
     ) -> SolveResult:
-        sampled_few_shot_displays = random.sample(self.few_shot_displays, self.num_few_shots)
+        sampled_few_shot_displays = get_rng().sample(self.few_shot_displays, self.num_few_shots)
         few_shots = "\n\n".join([f"Example {i+1}:\n{display}" for i, display in enumerate(sampled_few_shot_displays)])
         total_cost = 0.0
         env_reset_res = env.reset(task_index=task_index)
@@ -48,6 +48,7 @@ class FewShotToolCallingAgent(Agent):
         ]
         for _ in range(max_num_steps):
             res = completion(
+                role=Role.AGENT,
                 messages=messages,
                 model=self.model,
                 custom_llm_provider=self.provider,
@@ -1,12 +1,12 @@
 # Copyright Sierra
 
 import json
-from litellm import completion
+from tau_bench.llm import Role, acompletion, completion
 from typing import List, Optional, Dict, Any
 
-from tau_bench.agents.base import Agent
+from tau_bench.agents.base import Agent, merge_info
 from tau_bench.envs.base import Env
-from tau_bench.types import SolveResult, Action, RESPOND_ACTION_NAME
+from tau_bench.types import SolveResult, Action, EnvResponse, RESPOND_ACTION_NAME
 
 
 class ToolCallingAgent(Agent):
@@ -24,52 +24,65 @@ class ToolCallingAgent(Agent):
         self.provider = provider
         self.temperature = temperature
 
+    def initial_messages(self, observation: str) -> List[Dict[str, Any]]:
+        return [
+            {"role": "system", "content": self.wiki},
+            {"role": "user", "content": observation},
+        ]
+
+    def request(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(
+            role=Role.AGENT,
+            messages=messages,
+            model=self.model,
+            custom_llm_provider=self.provider,
+            tools=self.tools_info,
+            temperature=self.temperature,
+        )
+
     def solve(
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
     ) -> SolveResult:
         total_cost = 0.0
         env_reset_res = env.reset(task_index=task_index)
-        obs = env_reset_res.observation
         info = env_reset_res.info.model_dump()
         reward = 0.0
-        messages: List[Dict[str, Any]] = [
-            {"role": "system", "content": self.wiki},
-            {"role": "user", "content": obs},
-        ]
+        messages = self.initial_messages(env_reset_res.observation)
         for _ in range(max_num_steps):
-            res = completion(
-                messages=messages,
-                model=self.model,
-                custom_llm_provider=self.provider,
-                tools=self.tools_info,
-                temperature=self.temperature,
-            )
+            res = completion(**self.request(messages))
             next_message = res.choices[0].message.model_dump()
             total_cost += res._hidden_params["response_cost"] or 0
             action = message_to_action(next_message)
             env_response = env.step(action)
             reward = env_response.reward
-            info = {**info, **env_response.info.model_dump()}
-            if action.name != RESPOND_ACTION_NAME:
-                next_message["tool_calls"] = next_message["tool_calls"][:1]
-                messages.extend(
-                    [
-                        next_message,
-                        {
-                            "role": "tool",
-                            "tool_call_id": next_message["tool_calls"][0]["id"],
-                            "name": next_message["tool_calls"][0]["function"]["name"],
-                            "content": env_response.observation,
-                        },
-                    ]
-                )
-            else:
-                messages.extend(
-                    [
-                        next_message,
-                        {"role": "user", "content": env_response.observation},
-                    ]
-                )
+            info = merge_info(info, env_response)
+            messages.extend(step_messages(next_message, action, env_response))
+            if env_response.done:
+                break
+        return SolveResult(
+            reward=reward,
+            info=info,
+            messages=messages,
+            total_cost=total_cost,
+        )
+
+    async def asolve(
+        self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
+    ) -> SolveResult:
+        total_cost = 0.0
+        env_reset_res = await env.areset(task_index=task_index)
+        info = env_reset_res.info.model_dump()
+        reward = 0.0
+        messages = self.initial_messages(env_reset_res.observation)
+        for _ in range(max_num_steps):
+            res = await acompletion(**self.request(messages))
+            next_message = res.choices[0].message.model_dump()
+            total_cost += res._hidden_params["response_cost"] or 0
+            action = message_to_action(next_message)
+            env_response = await env.astep(action)
+            reward = env_response.reward
+            info = merge_info(info, env_response)
+            messages.extend(step_messages(next_message, action, env_response))
             if env_response.done:
                 break
         return SolveResult(
@@ -80,6 +93,27 @@ class ToolCallingAgent(Agent):
         )
 
 
+def step_messages(
+    next_message: Dict[str, Any], action: Action, env_response: EnvResponse
+) -> List[Dict[str, Any]]:
+    """The agent message of a step and the tool output or user reply that answers it."""
+    if action.name != RESPOND_ACTION_NAME:
+        next_message["tool_calls"] = next_message["tool_calls"][:1]
+        return [
+            next_message,
+            {
+                "role": "tool",
+                "tool_call_id": next_message["tool_calls"][0]["id"],
+                "name": next_message["tool_calls"][0]["function"]["name"],
+                "content": env_response.observation,
+            },
+        ]
+    return [
+        next_message,
+        {"role": "user", "content": env_response.observation},
+    ]
+
+
 def message_to_action(
     message: Dict[str, Any],
 ) -> Action:
@@ -0,0 +1,6 @@
+# Copyright Sierra
+
+from tau_bench.bench.tools import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Copyright Sierra
+
+import argparse
+import random
+import time
+
+from tau_bench.envs import get_env
+from tau_bench.envs.airline.availability import (
+    CABINS,
+    find_available_flights,
+    is_available,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare availability queries on the airline flights by scanning the records and with the columnar index"
+    )
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = get_env(
+        "airline", user_strategy="human", user_model="", task_split="test", task_index=0
+    )
+    flights = env.data["flights"]
+    airports = sorted(set(flight["origin"] for flight in flights.values()))
+    dates = sorted(set(date for flight in flights.values() for date in flight["dates"]))
+    rng = random.Random(args.seed)
+    queries = [
+        dict(
+            date=rng.choice(dates),
+            origin=rng.choice(airports + [None]),
+            destination=rng.choice([None] * 3 + airports),
+            cabin=rng.choice(CABINS),
+            min_seats=rng.randint(1, 10),
+        )
+        for _ in range(args.queries)
+    ]
+
+    def scan(query):
+        return [key for key, flight in flights.items() if is_available(flight, **query)]
+
+    for query in queries:
+        assert find_available_flights(flights, **query) == scan(query), query
+    print(f"{'method':10} {'us/query':>10}")
+    for label, query_fn in [
+        ("scan", scan),
+        ("columnar", lambda query: find_available_flights(flights, **query)),
+    ]:
+        start = time.perf_counter()
+        for query in queries:
+            query_fn(query)
+        elapsed = time.perf_counter() - start
+        print(f"{label:10} {elapsed / len(queries) * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Copyright Sierra
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from tau_bench.envs import get_env
+from tau_bench.envs.base import Env
+from tau_bench.envs.hashing import consistent_hash, hash_data, to_hashable
+from tau_bench.types import Action
+
+ENVS = ["retail", "airline", "healthcare"]
+
+
+def full_hash(data: Dict[str, Any]) -> str:
+    # the hash Env.get_data_hash used before the incremental one
+    return consistent_hash(to_hashable(data))
+
+
+def replay(env: Env, actions: List[Action]) -> Dict[str, Any]:
+    env.data = env.snapshot.fork()
+    for action in actions:
+        if action.name in env.tools_map and action.name not in env.terminate_tools:
+            env.invoke_tool(action)
+    return env.data
+
+
+def time_ms(func: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_env(env_name: str, num_tasks: int, repeat: int) -> Dict[str, float]:
+    env = get_env(
+        env_name, user_strategy="human", user_model="", task_split="test", task_index=0
+    )
+    forks = [replay(env, task.actions) for task in env.tasks[:num_tasks]]
+    start = time.perf_counter()
+    hash_data(env.snapshot.fork())
+    cold_ms = (time.perf_counter() - start) * 1000
+    full_ms = sum(time_ms(lambda: full_hash(data), repeat) for data in forks) / len(
+        forks
+    )
+    incremental_ms = 0.0
+    for data in forks:
+        for table in data.values():
+            # rehash the touched records on every run instead of only the first
+            table.dirty.update(getattr(table, "records", ()))
+        incremental_ms += time_ms(lambda: hash_data(data), repeat)
+    return {
+        "full_ms": full_ms,
+        "incremental_ms": incremental_ms / len(forks),
+        "incremental_cold_ms": cold_ms,
+    }
+
+
+def verify_env(env_name: str) -> int:
+    """Checks that both hashes agree on which states are equal, over every test task."""
+    env = get_env(
+        env_name, user_strategy="human", user_model="", task_split="test", task_index=0
+    )
+    num_mismatches = 0
+    for task_index, task in enumerate(env.tasks):
+        states = [
+            replay(env, task.actions),
+            replay(env, task.actions[:-1]),
+            env.snapshot.fork(),
+        ]
+        full_hashes = [full_hash(data) for data in states]
+        incremental_hashes = [hash_data(data) for data in states]
+        for i in range(len(states)):
+            for j in range(i + 1, len(states)):
+                if (full_hashes[i] == full_hashes[j]) != (
+                    incremental_hashes[i] == incremental_hashes[j]
+                ):
+                    num_mismatches += 1
+                    print(
+                        f"❌ {env_name} task {task_index}: hashes disagree on states {i} and {j}"
+                    )
+    return num_mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the incremental data hash with the full to_hashable hash"
+    )
+    parser.add_argument("--env", type=str, nargs="+", choices=ENVS, default=ENVS)
+    parser.add_argument(
+        "--num-tasks",
+        type=int,
+        default=20,
+        help="Number of test tasks to replay per env",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Also check that both hashes give the same verdicts",
+    )
+    args = parser.parse_args()
+    print(
+        f"{'env':12} {'full (ms)':>12} {'incremental (ms)':>18} {'cold (ms)':>12} {'speedup':>9}"
+    )
+    for env_name in args.env:
+        res = bench_env(env_name, args.num_tasks, args.repeat)
+        speedup = res["full_ms"] / max(res["incremental_ms"], 1e-9)
+        print(
+            f"{env_name:12} {res['full_ms']:12.3f} {res['incremental_ms']:18.3f} {res['incremental_cold_ms']:12.3f} {speedup:8.1f}x"
+        )
+    if args.verify:
+        num_mismatches = sum(verify_env(env_name) for env_name in args.env)
+        print(
+            "✅ Hashes agree on every verdict"
+            if num_mismatches == 0
+            else f"❌ {num_mismatches} disagreements"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Copyright Sierra
+
+import argparse
+import importlib
+import time
+from typing import Dict
+
+from tau_bench.envs.compiled_data import (
+    compile_tables,
+    load_compiled_tables,
+    load_json_tables,
+)
+
+ENVS = ["retail", "airline", "healthcare"]
+
+
+def bench_env(env_name: str, repeat: int) -> Dict[str, float]:
+    data_module = importlib.import_module(f"tau_bench.envs.{env_name}.data")
+    folder, table_files = data_module.get_folder_path(), data_module.TABLE_FILES
+    if load_compiled_tables(folder, table_files) is None:
+        compile_tables(folder, table_files)
+    assert load_compiled_tables(folder, table_files) == load_json_tables(
+        folder, table_files
+    ), f"The compiled {env_name} data does not match the JSON files"
+    res = {}
+    for label, load in [
+        ("json_ms", lambda: load_json_tables(folder, table_files)),
+        ("compiled_ms", lambda: load_compiled_tables(folder, table_files)),
+        ("load_data_ms", data_module.load_data),
+    ]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            load()
+        res[label] = (time.perf_counter() - start) * 1000 / repeat
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare loading each env database from JSON and from its compiled file"
+    )
+    parser.add_argument("--env", type=str, nargs="+", choices=ENVS, default=ENVS)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(
+        f"{'env':12} {'json (ms)':>12} {'compiled (ms)':>15} {'load_data (ms)':>16} {'speedup':>9}"
+    )
+    for env_name in args.env:
+        res = bench_env(env_name, args.repeat)
+        speedup = res["json_ms"] / max(res["compiled_ms"], 1e-9)
+        print(
+            f"{env_name:12} {res['json_ms']:12.2f} {res['compiled_ms']:15.2f} {res['load_data_ms']:16.2f} {speedup:8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Copyright Sierra
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+USER_PROMPT_PREFIX = "You are a user interacting with an agent."
+
+
+def count_turns(messages: List[Dict[str, Any]]) -> int:
+    return sum(1 for message in messages if message["role"] == "assistant")
+
+
+def generate_reply(body: Dict[str, Any], turns: int) -> str:
+    """Replies like a model that plays along for `turns` turns and then ends the episode."""
+    messages = body["messages"]
+    system_prompt = messages[0]["content"] if messages[0]["role"] == "system" else ""
+    if system_prompt.startswith(USER_PROMPT_PREFIX):
+        if count_turns(messages) >= turns:
+            return "###STOP###"
+        if "User Response:" in system_prompt:
+            return "Thought:\nI should ask for help.\nUser Response:\nI need some help with my account."
+        return "I need some help with my account."
+    content = "Could you tell me more about what you need?"
+    if "tools" not in body and "Action:" in system_prompt:
+        action = {"name": "respond", "arguments": {"content": content}}
+        return "Thought:\nI should ask the user.\nAction:\n" + json.dumps(action)
+    return content
+
+
+def build_completion(body: Dict[str, Any], content: str) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+    }
+
+
+async def handle_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    latency: float,
+    turns: int,
+) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", "0")))
+            if latency > 0:
+                await asyncio.sleep(latency)
+            _, path, _ = request_line.decode("latin-1").split(" ", 2)
+            if path.rstrip("/").endswith("/chat/completions"):
+                request = json.loads(body)
+                status = "200 OK"
+                payload = build_completion(request, generate_reply(request, turns))
+            else:
+                status = "404 Not Found"
+                payload = {"error": {"message": f"Unknown path {path}"}}
+            response = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(response)}\r\n\r\n".encode(
+                    "latin-1"
+                )
+                + response
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, latency: float, turns: int) -> None:
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(reader, writer, latency, turns),
+        host=host,
+        port=port,
+        backlog=4096,
+    )
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"listening on http://{host}:{port}/v1", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def start_stub_server(
+    latency: float = 0.0, turns: int = 3
+) -> Tuple[str, subprocess.Popen]:
+    """Starts the stub server in a subprocess and returns its OpenAI-compatible base URL."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tau_bench.bench.stub_llm",
+            "--port",
+            "0",
+            "--latency",
+            str(latency),
+            "--turns",
+            str(turns),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout is not None
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError("The stub LLM server failed to start")
+    return line[len("listening on ") :].strip(), process
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve canned OpenAI-compatible chat completions for tests and benchmarks"
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds to wait before each reply"
+    )
+    parser.add_argument(
+        "--turns",
+        type=int,
+        default=3,
+        help="Number of user turns before the simulated user ends the episode",
+    )
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.latency, args.turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Copyright Sierra
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from tau_bench.bench.stub_llm import start_stub_server
+from tau_bench.envs.pool import EnvPool
+from tau_bench.run import agent_factory, run_concurrently
+from tau_bench.types import EnvRunResult, RunConfig
+
+RUNNERS = ["thread", "async"]
+
+
+def bench_runner(config: RunConfig, idxs: List[int]) -> Dict[str, float]:
+    env_pool = EnvPool(
+        config.env,
+        user_strategy=config.user_strategy,
+        user_model=config.user_model,
+        user_provider=config.user_model_provider,
+        task_split=config.task_split,
+    )
+    env = env_pool.acquire()
+    env_pool.release(env)
+    agent = agent_factory(tools_info=env.tools_info, wiki=env.wiki, config=config)
+
+    def _run(idx: int) -> EnvRunResult:
+        with env_pool.checkout(task_index=idx) as env:
+            res = agent.solve(env=env, task_index=idx)
+        return EnvRunResult(
+            task_id=idx, reward=res.reward, info=res.info, traj=res.messages, trial=0
+        )
+
+    async def _arun(idx: int) -> EnvRunResult:
+        with env_pool.checkout(task_index=idx) as env:
+            res = await agent.asolve(env=env, task_index=idx)
+        return EnvRunResult(
+            task_id=idx, reward=res.reward, info=res.info, traj=res.messages, trial=0
+        )
+
+    start = time.perf_counter()
+    if config.runner == "async":
+        results = asyncio.run(run_concurrently(_arun, idxs, config.max_concurrency))
+    else:
+        with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+            results = list(executor.map(_run, idxs))
+    elapsed = time.perf_counter() - start
+    assert len(results) == len(idxs)
+    return {
+        "seconds": elapsed,
+        "episodes_per_second": len(idxs) / elapsed,
+        "envs": env_pool.num_created,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare episode throughput of the thread and async runners against a local stub LLM server"
+    )
+    parser.add_argument(
+        "--env", type=str, choices=["retail", "airline"], default="retail"
+    )
+    parser.add_argument("--episodes", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Seconds the stub server waits before each reply",
+    )
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument(
+        "--runner", type=str, nargs="+", choices=RUNNERS, default=RUNNERS
+    )
+    args = parser.parse_args()
+
+    base_url, server = start_stub_server(latency=args.latency, turns=args.turns)
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    try:
+        print(
+            f"{'runner':8} {'concurrency':>12} {'seconds':>9} {'episodes/s':>11} {'envs':>6}"
+        )
+        for concurrency in args.concurrency:
+            for runner in args.runner:
+                config = RunConfig(
+                    env=args.env,
+                    model="gpt-4o",
+                    model_provider="openai",
+                    user_model="gpt-4o",
+                    user_model_provider="openai",
+                    max_concurrency=concurrency,
+                    runner=runner,
+                )
+                res = bench_runner(config, [i % 50 for i in range(args.episodes)])
+                print(
+                    f"{runner:8} {concurrency:12} {res['seconds']:9.2f} {res['episodes_per_second']:11.1f} {int(res['envs']):6}"
+                )
+    finally:
+        server.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# Copyright Sierra
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from tau_bench.envs import get_env
+from tau_bench.envs.base import Env
+
+ENVS = ["retail", "airline", "healthcare"]
+TASK_SPLITS = ["test", "train"]
+# relative increase over the baseline above which a tool is reported as a regression
+DEFAULT_THRESHOLD = 0.2
+# p99 over a few dozen calls is too noisy to compare between runs
+COMPARED_STATS = ["p50_us", "alloc_kb"]
+# back-to-back runs of the same code differ by a few microseconds on the fastest tools
+MIN_DELTA = {"p50_us": 5.0, "alloc_kb": 1.0}
+# the spread of a statistic over the rounds of a run, kept to tell changes from noise
+SPREAD_STATS = {"p50_us": "p50_spread_us"}
+
+
+def load_envs(env_names: List[str], task_splits: List[str]) -> List[Env]:
+    envs = []
+    for env_name in env_names:
+        for task_split in task_splits:
+            try:
+                env = get_env(
+                    env_name,
+                    user_strategy="human",
+                    user_model="",
+                    task_split=task_split,
+                    task_index=0,
+                )
+            except ValueError:
+                # not every env has every split
+                continue
+            envs.append(env)
+    return envs
+
+
+def replay(env: Env, trace_allocations: bool) -> List[Tuple[str, float, int, int]]:
+    """Replays the ground truth actions of every task, each task on a fresh fork of the snapshot.
+
+    Returns the tool name, seconds, peak bytes allocated (when traced) and output
+    length of each call.
+    """
+    calls = []
+    for task in env.tasks:
+        data = env.snapshot.fork()
+        for action in task.actions:
+            tool = env.tools_map.get(action.name)
+            if tool is None:
+                continue
+            if trace_allocations:
+                tracemalloc.reset_peak()
+                start_bytes = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                output = tool.invoke(data=data, **action.kwargs)
+            except Exception as e:
+                output = f"Error: {e}"
+            elapsed = time.perf_counter() - start
+            allocated = (
+                tracemalloc.get_traced_memory()[1] - start_bytes
+                if trace_allocations
+                else 0
+            )
+            calls.append((action.name, elapsed, allocated, len(str(output))))
+    return calls
+
+
+def time_calls(env: Env, repeat: int) -> Dict[str, List[float]]:
+    # the replays make the same calls in the same order, so each call keeps its
+    # fastest time over the repeats, which filters out most of the timing noise
+    runs = [replay(env, trace_allocations=False) for _ in range(repeat)]
+    latencies: Dict[str, List[float]] = {}
+    for calls in zip(*runs):
+        latencies.setdefault(calls[0][0], []).append(min(call[1] for call in calls))
+    return latencies
+
+
+def bench(envs: List[Env], repeat: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    """Times the tools of every env in `rounds` rounds of `repeat` replays each.
+
+    The reported p50 is the median of the p50s of the rounds, and the spread of
+    those p50s tells how much the p50 moves between runs of the same code. Each
+    round goes through all envs, so the rounds of a tool are spread over the
+    whole run rather than a second of it, and so is the load of the machine.
+    """
+    for env in envs:
+        # the first replay builds the snapshot indexes and caches, which are shared by later forks
+        replay(env, trace_allocations=False)
+    round_latencies: List[List[Dict[str, List[float]]]] = [[] for _ in envs]
+    for _ in range(rounds):
+        for env, env_rounds in zip(envs, round_latencies):
+            env_rounds.append(time_calls(env, repeat))
+    results: Dict[str, Dict[str, float]] = {}
+    for env, env_rounds in zip(envs, round_latencies):
+        for name, stats in bench_env(env, env_rounds).items():
+            results[f"{env.env_name}/{env.task_split}/{name}"] = stats
+    return results
+
+
+def bench_env(
+    env: Env, round_latencies: List[Dict[str, List[float]]]
+) -> Dict[str, Dict[str, float]]:
+    latencies = round_latencies[0]
+    # tracing slows down every allocation, so allocations are measured on their own pass
+    allocations: Dict[str, List[int]] = {}
+    output_sizes: Dict[str, List[int]] = {}
+    tracemalloc.start()
+    try:
+        for name, _, allocated, output_size in replay(env, trace_allocations=True):
+            allocations.setdefault(name, []).append(allocated)
+            output_sizes.setdefault(name, []).append(output_size)
+    finally:
+        tracemalloc.stop()
+    stats = {}
+    for name in sorted(latencies):
+        us = np.array([round_[name] for round_ in round_latencies]) * 1e6
+        p50s = np.percentile(us, 50, axis=1)
+        stats[name] = {
+            "calls": len(allocations[name]),
+            "p50_us": float(np.median(p50s)),
+            "p50_spread_us": float(np.max(p50s) - np.min(p50s)),
+            "p99_us": float(np.median(np.percentile(us, 99, axis=1))),
+            "alloc_kb": float(np.mean(allocations[name])) / 1024,
+            "max_alloc_kb": float(np.max(allocations[name])) / 1024,
+            "output_bytes": float(np.mean(output_sizes[name])),
+        }
+    return stats
+
+
+def merge_runs(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Merges the results of repeated runs into one baseline, holding the median of each statistic.
+
+    The spread of a statistic covers both the rounds within each run and the
+    difference between the runs, which also catches slow periods of the machine
+    that last a whole run.
+    """
+    merged = {}
+    for key in runs[0]:
+        if not all(key in run for run in runs):
+            continue
+        stats = {
+            stat: float(np.median([run[key][stat] for run in runs]))
+            for stat in runs[0][key]
+        }
+        for stat, spread in SPREAD_STATS.items():
+            values = [run[key][stat] for run in runs]
+            stats[spread] = max(
+                [max(values) - min(values)]
+                # baselines written before the spread was measured don't have it
+                + [run[key].get(spread, 0.0) for run in runs]
+            )
+        merged[key] = stats
+    return merged
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Returns one line per statistic that grew by more than `threshold` over the baseline.
+
+    An increase is only reported when it is also larger than `MIN_DELTA` and than
+    the spread of the statistic in either the results or the baseline.
+    """
+    regressions = []
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        for stat in COMPARED_STATS:
+            before, after = baseline[key][stat], stats[stat]
+            noise = MIN_DELTA[stat]
+            if stat in SPREAD_STATS:
+                spread = SPREAD_STATS[stat]
+                noise = max(noise, baseline[key][spread], stats[spread])
+            if after > before * (1 + threshold) and after - before > noise:
+                regressions.append(
+                    f"{key} {stat}: {before:.1f} -> {after:.1f} (+{(after / max(before, 1e-9) - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time every tool on the ground truth actions of the tasks, each task on a fresh snapshot fork"
+    )
+    parser.add_argument("--env", type=str, nargs="+", choices=ENVS, default=ENVS)
+    parser.add_argument(
+        "--task-split", type=str, nargs="+", choices=TASK_SPLITS, default=TASK_SPLITS
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed replays of all tasks in each round, each call keeps its fastest time",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=5,
+        help="Number of rounds, the reported p50 is the median over the rounds",
+    )
+    parser.add_argument("--output", type=str, help="Write the results to a JSON file")
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        nargs="+",
+        help="JSON files written with --output to compare the results against, the more runs the better the noise is known",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative increase of p50 latency or allocations reported as a regression",
+    )
+    args = parser.parse_args()
+
+    results = bench(load_envs(args.env, args.task_split), args.repeat, args.rounds)
+
+    print(
+        f"{'tool':48} {'calls':>6} {'p50 (us)':>10} {'spread':>8} {'p99 (us)':>10} {'alloc (KB)':>11} {'output (B)':>11}"
+    )
+    for key, stats in results.items():
+        print(
+            f"{key:48} {stats['calls']:6} {stats['p50_us']:10.1f} {stats['p50_spread_us']:8.1f} {stats['p99_us']:10.1f} {stats['alloc_kb']:11.1f} {stats['output_bytes']:11.0f}"
+        )
+
+    if args.output:
+        report: Dict[str, Any] = {
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "rounds": args.rounds,
+            "tools": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        runs = []
+        for path in args.baseline:
+            with open(path) as f:
+                runs.append(json.load(f)["tools"])
+        regressions = compare(results, merge_runs(runs), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(
+            f"{len(regressions)} regressions against {', '.join(args.baseline)} (threshold {args.threshold:.0%})"
+        )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
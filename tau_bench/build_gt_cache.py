@@ -0,0 +1,56 @@
+# Copyright Sierra
+
+import argparse
+
+from tau_bench.envs import get_env
+
+
+def build_gt_cache(env_name: str, task_split: str) -> int:
+    env = get_env(
+        env_name,
+        user_strategy="human",
+        user_model="",
+        task_split=task_split,
+        task_index=0,
+    )
+    if env.gt_cache is None:
+        raise ValueError("The ground truth cache is disabled (TAU_BENCH_GT_CACHE=0)")
+    for task_index in range(len(env.tasks)):
+        env.get_gt_data_hash(task_index, save=False)
+    env.gt_cache.save()
+    return len(env.tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute the ground truth data hashes used by Env.calculate_reward"
+    )
+    parser.add_argument(
+        "--env",
+        type=str,
+        nargs="+",
+        choices=["retail", "airline", "healthcare"],
+        default=["retail", "airline", "healthcare"],
+    )
+    parser.add_argument(
+        "--task-split",
+        type=str,
+        nargs="+",
+        choices=["train", "test", "dev"],
+        default=["test"],
+    )
+    args = parser.parse_args()
+    for env_name in args.env:
+        for task_split in args.task_split:
+            try:
+                num_tasks = build_gt_cache(env_name, task_split)
+            except ValueError as e:
+                print(f"Skipping {env_name}/{task_split}: {e}")
+                continue
+            print(
+                f"Cached ground truth hashes for {num_tasks} {env_name}/{task_split} tasks"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Copyright Sierra
+
+import enum
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from tau_bench.types import EnvRunResult, RunConfig
+
+# the arguments a checkpoint can only be resumed with
+RESUME_FIELDS = [
+    "env",
+    "task_split",
+    "agent_strategy",
+    "model",
+    "model_provider",
+    "temperature",
+    "few_shot_displays_path",
+    "user_strategy",
+    "user_model",
+    "user_model_provider",
+    # episodes draw their tasks and few-shot examples from generators seeded with it
+    "seed",
+]
+
+
+class FsyncPolicy(enum.Enum):
+    # fsync after every result, so a result survives a machine crash once written
+    ALWAYS = "always"
+    # flush after every result, so a result survives the process being killed
+    NEVER = "never"
+
+
+def truncate_partial_line(path: str, block_size: int = 1 << 16) -> None:
+    # drops a last line cut short by a killed run, so appends start on a new line
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block_size)
+            f.seek(start)
+            index = f.read(pos - start).rfind(b"\n")
+            if index != -1:
+                f.truncate(start + index + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+class CheckpointWriter(object):
+    """Appends run results to a JSONL checkpoint, one line per `EnvRunResult`.
+
+    Writing a result costs one line of I/O no matter how many results the
+    checkpoint already holds, and results are serialized before the lock is taken.
+    """
+
+    def __init__(
+        self, path: str, fsync: Union[str, FsyncPolicy] = FsyncPolicy.NEVER
+    ) -> None:
+        self.path = path
+        self.fsync = FsyncPolicy(fsync)
+        self.lock = threading.Lock()
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        if os.path.exists(path):
+            truncate_partial_line(path)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, result: EnvRunResult) -> None:
+        line = json.dumps(result.model_dump()) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            if self.fsync == FsyncPolicy.ALWAYS:
+                os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self) -> "CheckpointWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def read_checkpoint_records(path: str) -> List[Dict[str, Any]]:
+    """Reads the raw results of a JSONL checkpoint or of a JSON results file."""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    records = []
+    lines = content.splitlines()
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # the last line is cut short if the run was killed while writing it
+            if i == len(lines) - 1:
+                break
+            raise
+    return records
+
+
+def read_checkpoint(path: str) -> List[EnvRunResult]:
+    return [EnvRunResult(**record) for record in read_checkpoint_records(path)]
+
+
+def export_results(results: List[EnvRunResult], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump([result.model_dump() for result in results], f, indent=2)
+
+
+def is_error(result: EnvRunResult) -> bool:
+    # the episode failed before it could be scored, e.g. on an API error
+    return "error" in result.info
+
+
+def latest_results(results: List[EnvRunResult]) -> List[EnvRunResult]:
+    """Keeps one result per (task, trial) pair, replacing error results with later retries."""
+    by_pair: Dict[Tuple[int, int], EnvRunResult] = {}
+    for result in results:
+        pair = (result.task_id, result.trial)
+        if pair not in by_pair or is_error(by_pair[pair]):
+            by_pair[pair] = result
+    return list(by_pair.values())
+
+
+def config_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".config.json"
+
+
+def write_checkpoint_config(path: str, config: RunConfig) -> None:
+    """Saves the configuration of a run next to its checkpoint, so a resume can check it."""
+    with open(config_path(path), "w", encoding="utf-8") as f:
+        json.dump(config.model_dump(), f, indent=2)
+
+
+def check_resume_config(path: str, config: RunConfig) -> None:
+    """Raises if the checkpoint was written with other `RESUME_FIELDS` than `config`."""
+    try:
+        with open(config_path(path), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(
+            f"{path} has no saved configuration at {config_path(path)}, so it cannot be checked against the current arguments"
+        )
+    mismatches = [
+        f"{field}={saved.get(field)!r} (now {getattr(config, field)!r})"
+        for field in RESUME_FIELDS
+        if saved.get(field) != getattr(config, field)
+    ]
+    if mismatches:
+        raise ValueError(
+            f"{path} was written with other arguments: {', '.join(mismatches)}"
+        )
@@ -0,0 +1,24 @@
+# Copyright Sierra
+
+import argparse
+import importlib
+
+from tau_bench.envs.compiled_data import compile_tables
+
+ENVS = ["retail", "airline", "healthcare"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the JSON databases of each env into a binary file that load_data reads when it is fresh"
+    )
+    parser.add_argument("--env", type=str, nargs="+", choices=ENVS, default=ENVS)
+    args = parser.parse_args()
+    for env_name in args.env:
+        data_module = importlib.import_module(f"tau_bench.envs.{env_name}.data")
+        path = compile_tables(data_module.get_folder_path(), data_module.TABLE_FILES)
+        print(f"Compiled {env_name} data to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Copyright Sierra
+
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+import numpy as np
+
+from tau_bench.envs.indexes import patch_base_keys
+from tau_bench.envs.snapshot import TableOverlay
+
+CABINS = ["basic_economy", "economy", "business"]
+
+
+class FlightAvailability(object):
+    """A columnar copy of the schedule of a flights table: flight × date × cabin.
+
+    `available` holds whether a flight is bookable on a date, and `seats` and
+    `prices` hold its seats left and price per cabin on that date (zero when it
+    is not bookable). Airports are stored as small integer codes.
+    """
+
+    def __init__(self, flights: Mapping[str, Any]) -> None:
+        self.flight_keys = list(flights)
+        self.dates = sorted(
+            set(date for flight in flights.values() for date in flight["dates"])
+        )
+        self.date_positions = {date: i for i, date in enumerate(self.dates)}
+        self.airports: Dict[str, int] = {}
+        for flight in flights.values():
+            self.airports.setdefault(flight["origin"], len(self.airports))
+            self.airports.setdefault(flight["destination"], len(self.airports))
+        shape = (len(self.flight_keys), len(self.dates))
+        self.origins = np.array(
+            [self.airports[flight["origin"]] for flight in flights.values()],
+            dtype=np.int32,
+        )
+        self.destinations = np.array(
+            [self.airports[flight["destination"]] for flight in flights.values()],
+            dtype=np.int32,
+        )
+        self.available = np.zeros(shape, dtype=bool)
+        self.seats = np.zeros(shape + (len(CABINS),), dtype=np.int64)
+        self.prices = np.zeros(shape + (len(CABINS),), dtype=np.float64)
+        for i, flight in enumerate(flights.values()):
+            for date, info in flight["dates"].items():
+                if info["status"] != "available":
+                    continue
+                j = self.date_positions[date]
+                self.available[i, j] = True
+                for k, cabin in enumerate(CABINS):
+                    self.seats[i, j, k] = info["available_seats"][cabin]
+                    self.prices[i, j, k] = info["prices"][cabin]
+
+    def query(
+        self,
+        date: str,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        cabin: Optional[str] = None,
+        min_seats: int = 0,
+        max_price: Optional[float] = None,
+    ) -> List[str]:
+        j = self.date_positions.get(date)
+        if j is None:
+            return []
+        mask = self.available[:, j].copy()
+        for airport, codes in [
+            (origin, self.origins),
+            (destination, self.destinations),
+        ]:
+            if airport is not None:
+                if airport not in self.airports:
+                    return []
+                mask &= codes == self.airports[airport]
+        if cabin is not None:
+            k = CABINS.index(cabin)
+            if min_seats > 0:
+                mask &= self.seats[:, j, k] >= min_seats
+            if max_price is not None:
+                mask &= self.prices[:, j, k] <= max_price
+        return [self.flight_keys[i] for i in np.flatnonzero(mask)]
+
+
+def is_available(
+    flight: Dict[str, Any],
+    date: str,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    cabin: Optional[str] = None,
+    min_seats: int = 0,
+    max_price: Optional[float] = None,
+) -> bool:
+    # the same query as `FlightAvailability.query`, on one flight record
+    if origin is not None and flight["origin"] != origin:
+        return False
+    if destination is not None and flight["destination"] != destination:
+        return False
+    if date not in flight["dates"] or flight["dates"][date]["status"] != "available":
+        return False
+    if cabin is not None:
+        info = flight["dates"][date]
+        if min_seats > 0 and info["available_seats"][cabin] < min_seats:
+            return False
+        if max_price is not None and info["prices"][cabin] > max_price:
+            return False
+    return True
+
+
+def find_available_flights(
+    flights: Union[TableOverlay, Dict[str, Any]],
+    date: str,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    cabin: Optional[str] = None,
+    min_seats: int = 0,
+    max_price: Optional[float] = None,
+) -> List[str]:
+    """Keys of the flights bookable on `date` that match every given filter, in table order.
+
+    The snapshot is answered from its `FlightAvailability`, built once and shared
+    by every fork. Flights that a fork has booked, edited or deleted are checked
+    on their records instead, so the result always matches a scan of the table.
+    """
+    query = dict(
+        date=date,
+        origin=origin,
+        destination=destination,
+        cabin=cabin,
+        min_seats=min_seats,
+        max_price=max_price,
+    )
+    if not isinstance(flights, TableOverlay):
+        return [key for key, flight in flights.items() if is_available(flight, **query)]
+    availability = flights.cache.get(
+        "availability", lambda: FlightAvailability(flights.base)
+    )
+    return patch_base_keys(
+        flights,
+        availability.query(**query),
+        lambda flight: is_available(flight, **query),
+    )
@@ -0,0 +1,31 @@
+# Copyright Sierra
+
+from typing import Any, Dict, List
+
+from tau_bench.envs.indexes import lookup, peek
+
+
+def flight_origin(flight: Dict[str, Any]) -> str:
+    return flight["origin"]
+
+
+def flight_route(flight: Dict[str, Any]) -> Any:
+    return (flight["origin"], flight["destination"])
+
+
+def find_flights_from(flights: Dict[str, Any], origin: str) -> List[Dict[str, Any]]:
+    return [
+        peek(flights, key)
+        for key in lookup(flights, "flights_by_origin", flight_origin, origin)
+    ]
+
+
+def find_flights_between(
+    flights: Dict[str, Any], origin: str, destination: str
+) -> List[Dict[str, Any]]:
+    return [
+        peek(flights, key)
+        for key in lookup(
+            flights, "flights_by_route", flight_route, (origin, destination)
+        )
+    ]
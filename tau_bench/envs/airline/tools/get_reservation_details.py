@@ -6,6 +6,8 @@ from tau_bench.envs.tool import Tool
 
 
 class GetReservationDetails(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], reservation_id: str) -> str:
         reservations = data["reservations"]
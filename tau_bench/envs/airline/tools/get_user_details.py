@@ -6,6 +6,8 @@ from tau_bench.envs.tool import Tool
 
 
 class GetUserDetails(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], user_id: str) -> str:
         users = data["users"]
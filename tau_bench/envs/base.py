@@ -1,11 +1,18 @@
 # Copyright Sierra
 
-import random
-from hashlib import sha256
+from tau_bench.envs.gt_cache import actions_digest, get_gt_cache, is_gt_cache_enabled
+from tau_bench.envs.hashing import consistent_hash as consistent_hash
+from tau_bench.envs.hashing import hash_data
+from tau_bench.envs.hashing import to_hashable as to_hashable
+from tau_bench.envs.memo import ToolMemo
+from tau_bench.envs.schema import get_arguments_validator
+from tau_bench.envs.snapshot import Transaction, load_snapshot
 from tau_bench.envs.tool import Tool
-from typing import Any, Callable, Dict, List, Type, Optional, Set, Union, Tuple
+from typing import Any, Callable, Dict, List, Sequence, Type, Optional, Union
 
 from tau_bench.envs.user import load_user, UserStrategy
+from tau_bench.llm import USER_ROLES, current_ledger
+from tau_bench.rng import get_rng
 from tau_bench.types import (
     Action,
     Task,
@@ -18,108 +25,186 @@ from tau_bench.types import (
     RESPOND_ACTION_NAME,
 )
 
-ToHashable = Union[
-    str, int, float, Dict[str, "ToHashable"], List["ToHashable"], Set["ToHashable"]
-]
-Hashable = Union[str, int, float, Tuple["Hashable"], Tuple[Tuple[str, "Hashable"]]]
-
-
-def to_hashable(item: ToHashable) -> Hashable:
-    if isinstance(item, dict):
-        return tuple((key, to_hashable(value)) for key, value in sorted(item.items()))
-    elif isinstance(item, list):
-        return tuple(to_hashable(element) for element in item)
-    elif isinstance(item, set):
-        return tuple(sorted(to_hashable(element) for element in item))
-    else:
-        return item
-
-
-def consistent_hash(
-    value: Hashable,
-) -> str:
-    return sha256(str(value).encode("utf-8")).hexdigest()
-
 
 class Env(object):
     def __init__(
         self,
         data_load_func: Callable[[], Dict[str, Any]],
         tools: List[Type[Tool]],
-        tasks: List[Task],
+        tasks: Sequence[Task],
         wiki: str,
         rules: List[str],
         user_strategy: Union[str, UserStrategy],
         user_model: str,
         user_provider: Optional[str] = None,
         task_index: Optional[int] = None,
+        env_name: Optional[str] = None,
+        task_split: Optional[str] = None,
+        user_options: Optional[Dict[str, Any]] = None,
     ) -> None:
         super().__init__()
         self.data_load_func = data_load_func
-        self.data = data_load_func()
+        self.snapshot = load_snapshot(data_load_func)
+        self.data = self.snapshot.fork()
+        self.memo = ToolMemo()
         self.tools_map: Dict[str, Type[Tool]] = {
             tool.get_info()["function"]["name"]: tool for tool in tools
         }
         self.tools_info = [tool.get_info() for tool in tools]
         self.terminate_tools = []
+        self.env_name = env_name
+        self.task_split = task_split
+        self.gt_cache = (
+            get_gt_cache(env_name, task_split, data_load_func, tools)
+            if env_name is not None
+            and task_split is not None
+            and is_gt_cache_enabled()
+            else None
+        )
         self.tasks = tasks
         if task_index is not None:
             self.task_index = task_index
         else:
-            self.task_index = random.randint(0, len(tasks) - 1) if tasks else 0
+            self.task_index = get_rng().randint(0, len(tasks) - 1) if tasks else 0
         self.task = tasks[self.task_index]
         self.wiki = wiki
         self.rules = rules
         self.user = load_user(
-            user_strategy=user_strategy, model=user_model, provider=user_provider
+            user_strategy=user_strategy,
+            model=user_model,
+            provider=user_provider,
+            options=user_options,
         )
         self.actions: List[Action] = []
 
     def reset(self, task_index: Optional[int] = None) -> EnvResetResponse:
-        if task_index is None:
-            task_index = random.randint(0, len(self.tasks) - 1) if self.tasks else 0
-        self.task_index = task_index
-        self.data = self.data_load_func()
-        self.task = self.tasks[task_index]
-        self.actions = []
+        self.prepare_reset(task_index)
         initial_observation = self.user.reset(instruction=self.task.instruction)
         return EnvResetResponse(
             observation=initial_observation, info=EnvInfo(task=self.task, source="user")
         )
 
+    async def areset(self, task_index: Optional[int] = None) -> EnvResetResponse:
+        self.prepare_reset(task_index)
+        initial_observation = await self.user.areset(instruction=self.task.instruction)
+        return EnvResetResponse(
+            observation=initial_observation, info=EnvInfo(task=self.task, source="user")
+        )
+
+    def prepare_reset(self, task_index: Optional[int] = None) -> None:
+        if task_index is None:
+            task_index = get_rng().randint(0, len(self.tasks) - 1) if self.tasks else 0
+        self.task_index = task_index
+        self.data = self.snapshot.fork()
+        self.memo = ToolMemo()
+        self.task = self.tasks[task_index]
+        self.actions = []
+
     def step(self, action: Action) -> EnvResponse:
+        if action.name == RESPOND_ACTION_NAME:
+            return self.finish_step(action, self.user.step(action.kwargs["content"]))
+        return self.finish_step(action)
+
+    async def astep(self, action: Action) -> EnvResponse:
+        # only the user simulator waits on I/O, tools and rewards run inline
+        if action.name == RESPOND_ACTION_NAME:
+            observation = await self.user.astep(action.kwargs["content"])
+            return self.finish_step(action, observation)
+        return self.finish_step(action)
+
+    def finish_step(
+        self, action: Action, user_observation: Optional[str] = None
+    ) -> EnvResponse:
         self.actions.append(action)
 
         info = EnvInfo(task=self.task)
         reward = 0
         done = False
         if action.name == RESPOND_ACTION_NAME:
-            observation = self.user.step(action.kwargs["content"])
+            assert user_observation is not None
+            observation = user_observation
             info.source = "user"
             done = "###STOP###" in observation
         elif action.name in self.tools_map:
-            try:
-                observation = self.tools_map[action.name].invoke(
-                    data=self.data, **action.kwargs
-                )
-            except Exception as e:
-                observation = f"Error: {e}"
+            observation = self.invoke_tool(action)
             info.source = action.name
             if action.name in self.terminate_tools:
                 done = True
         else:
             observation = f"Unknown action {action.name}"
             info.source = action.name
+        info.memo_hits = self.memo.hits
+        info.memo_misses = self.memo.misses
 
         if done:
             reward_res = self.calculate_reward()
             reward = reward_res.reward
             info.reward_info = reward_res
-            info.user_cost = self.user.get_total_cost()
+            ledger = current_ledger.get()
+            # the ledger also has the costs of the verify and reflect calls
+            info.user_cost = (
+                ledger.cost(USER_ROLES)
+                if ledger is not None
+                else self.user.get_total_cost()
+            )
         return EnvResponse(observation=observation, reward=reward, done=done, info=info)
 
+    def invoke_tool(self, action: Action) -> str:
+        tool = self.tools_map[action.name]
+        # reject malformed calls before the tool can write part of its changes
+        error = get_arguments_validator(tool)(action.kwargs)
+        if error is not None:
+            return f"Error: {error}"
+        if tool.read_only:
+            return self.memo.invoke(
+                self.data,
+                action.name,
+                action.kwargs,
+                lambda: self.run_tool(tool, action),
+            )
+        # a call that fails leaves the data as it was, however much it wrote before failing
+        transaction = Transaction(self.data)
+        observation = self.run_tool(tool, action)
+        if isinstance(observation, str) and observation.startswith("Error"):
+            transaction.rollback()
+        else:
+            transaction.commit()
+        return observation
+
+    def run_tool(self, tool: Type[Tool], action: Action) -> str:
+        try:
+            return tool.invoke(data=self.data, **action.kwargs)
+        except Exception as e:
+            return f"Error: {e}"
+
     def get_data_hash(self) -> str:
-        return consistent_hash(to_hashable(self.data))
+        return hash_data(self.data)
+
+    def compute_gt_data_hash(self, task: Task) -> str:
+        # replay the ground truth actions on a fresh fork, leaving the episode's data untouched
+        data, memo = self.data, self.memo
+        self.data, self.memo = self.snapshot.fork(), ToolMemo()
+        try:
+            for action in task.actions:
+                if (
+                    action.name in self.tools_map
+                    and action.name not in self.terminate_tools
+                ):
+                    self.invoke_tool(action)
+            return self.get_data_hash()
+        finally:
+            self.data, self.memo = data, memo
+
+    def get_gt_data_hash(self, task_index: int, save: bool = True) -> str:
+        task = self.tasks[task_index]
+        if self.gt_cache is None:
+            return self.compute_gt_data_hash(task)
+        digest = actions_digest(task.actions)
+        gt_data_hash = self.gt_cache.get(task_index, digest)
+        if gt_data_hash is None:
+            gt_data_hash = self.compute_gt_data_hash(task)
+            self.gt_cache.put(task_index, digest, gt_data_hash, save=save)
+        return gt_data_hash
 
     def calculate_reward(self) -> RewardResult:
         data_hash = self.get_data_hash()
@@ -129,12 +214,7 @@ class Env(object):
         ]
 
         # Check if the database changes are correct. If they are not correct, then we set the reward to 0.
-        # TODO: cache gt_data_hash in tasks.py (low priority)
-        self.data = self.data_load_func()
-        for action in self.task.actions:
-            if action.name not in self.terminate_tools:
-                self.step(action)
-        gt_data_hash = self.get_data_hash()
+        gt_data_hash = self.get_gt_data_hash(self.task_index)
         info = RewardActionInfo(
             r_actions=data_hash == gt_data_hash, gt_data_hash=gt_data_hash
         )
@@ -0,0 +1,134 @@
+# Copyright Sierra
+
+import gc
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+COMPILED_DATA_VERSION = 1
+COMPILED_FILE_NAME = "data.marshal"
+# the file is the length of the marshaled header, the header, then the marshaled tables
+HEADER_LENGTH = struct.Struct("<Q")
+# a directory with one database folder per env (e.g. written by tau_bench.generate_data)
+DATA_DIR_ENV_VAR = "TAU_BENCH_DATA_DIR"
+
+
+def get_data_folder(env_name: str, default_folder: str) -> str:
+    """The folder of the database of `env_name`: `$TAU_BENCH_DATA_DIR/<env_name>` if it exists, else `default_folder`."""
+    data_dir = os.environ.get(DATA_DIR_ENV_VAR)
+    if data_dir and os.path.isdir(os.path.join(data_dir, env_name)):
+        return os.path.join(data_dir, env_name)
+    return default_folder
+
+
+def get_compiled_path(folder: str) -> str:
+    return os.path.join(folder, COMPILED_FILE_NAME)
+
+
+def get_file_stats(folder: str, table_files: Dict[str, str]) -> List[List[int]]:
+    stats = []
+    for file_name in table_files.values():
+        stat = os.stat(os.path.join(folder, file_name))
+        stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def hash_files(folder: str, table_files: Dict[str, str]) -> str:
+    content_hash = hashlib.sha256()
+    for table_name, file_name in table_files.items():
+        with open(os.path.join(folder, file_name), "rb") as f:
+            content = f.read()
+        content_hash.update(
+            f"{table_name}:{file_name}:{len(content)}\n".encode("utf-8")
+        )
+        content_hash.update(content)
+    return content_hash.hexdigest()
+
+
+def make_header(
+    folder: str, table_files: Dict[str, str], content_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    return {
+        "version": COMPILED_DATA_VERSION,
+        # marshal is only guaranteed to round-trip on the same Python version
+        "python": list(sys.version_info[:2]),
+        "tables": list(table_files.items()),
+        "content_hash": content_hash or hash_files(folder, table_files),
+        "file_stats": get_file_stats(folder, table_files),
+    }
+
+
+def load_compiled_tables(
+    folder: str, table_files: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    """Returns the tables of the compiled file in `folder`, or None if it is missing or stale."""
+    try:
+        with open(get_compiled_path(folder), "rb") as f:
+            content = f.read()
+        (header_length,) = HEADER_LENGTH.unpack_from(content)
+        header = marshal.loads(
+            content[HEADER_LENGTH.size : HEADER_LENGTH.size + header_length]
+        )
+        expected = make_header(folder, table_files, content_hash="")
+        if (
+            not isinstance(header, dict)
+            or header.get("version") != expected["version"]
+            or header.get("python") != expected["python"]
+            or header.get("tables") != expected["tables"]
+        ):
+            return None
+        if header.get("file_stats") != expected["file_stats"]:
+            # the files were touched (e.g. by a checkout), so compare their contents
+            if header.get("content_hash") != hash_files(folder, table_files):
+                return None
+        # building millions of containers triggers many useless gc passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            tables = marshal.loads(content[HEADER_LENGTH.size + header_length :])
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return None
+    return tables
+
+
+def load_json_tables(folder: str, table_files: Dict[str, str]) -> Dict[str, Any]:
+    tables = {}
+    for table_name, file_name in table_files.items():
+        with open(os.path.join(folder, file_name)) as f:
+            tables[table_name] = json.load(f)
+    return tables
+
+
+def load_tables(folder: str, table_files: Dict[str, str]) -> Dict[str, Any]:
+    """Loads a domain database, from its compiled file when it is fresh and from the JSON files otherwise."""
+    tables = load_compiled_tables(folder, table_files)
+    if tables is None:
+        tables = load_json_tables(folder, table_files)
+    return tables
+
+
+def compile_tables(folder: str, table_files: Dict[str, str]) -> str:
+    """Compiles the JSON files of a domain database into one marshal file next to them."""
+    header = make_header(folder, table_files)
+    tables = load_json_tables(folder, table_files)
+    path = get_compiled_path(folder)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        header_content = marshal.dumps(header)
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER_LENGTH.pack(len(header_content)))
+            f.write(header_content)
+            f.write(marshal.dumps(tables))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
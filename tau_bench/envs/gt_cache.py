@@ -0,0 +1,177 @@
+# Copyright Sierra
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from tau_bench.envs.compiled_data import DATA_DIR_ENV_VAR
+from tau_bench.envs.tool import Tool
+from tau_bench.types import Action
+
+# bump whenever the way ground truth hashes are computed changes
+GT_CACHE_VERSION = 2
+ENGINE_MODULES = [
+    "tau_bench.envs.base",
+    "tau_bench.envs.hashing",
+    "tau_bench.envs.indexes",
+    "tau_bench.envs.memo",
+    "tau_bench.envs.schema",
+    "tau_bench.envs.snapshot",
+]
+
+
+def get_cache_dir() -> str:
+    return os.environ.get(
+        "TAU_BENCH_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "tau_bench"),
+    )
+
+
+def is_gt_cache_enabled() -> bool:
+    return os.environ.get("TAU_BENCH_GT_CACHE", "1") != "0"
+
+
+def actions_digest(actions: List[Action]) -> str:
+    return hashlib.sha256(
+        json.dumps([action.model_dump() for action in actions], sort_keys=True).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+
+
+def get_data_dir(data_load_func: Callable[[], Dict[str, Any]]) -> str:
+    module = sys.modules[data_load_func.__module__]
+    if hasattr(module, "get_folder_path"):
+        return module.get_folder_path()
+    return getattr(module, "FOLDER_PATH", os.path.dirname(inspect.getfile(module)))
+
+
+def compute_fingerprint(
+    data_load_func: Callable[[], Dict[str, Any]], tools: List[Type[Tool]]
+) -> str:
+    """Fingerprints everything a ground truth hash depends on: the data files, the tool source and the env engine."""
+    data_dir = get_data_dir(data_load_func)
+    paths = sorted(
+        os.path.join(data_dir, file_name)
+        for file_name in os.listdir(data_dir)
+        if file_name.endswith(".json")
+    )
+    tool_paths = sorted(set(inspect.getfile(tool) for tool in tools))
+    paths += tool_paths
+    # helpers that the tools import live in the domain package next to the tools package
+    for domain_dir in sorted(
+        set(os.path.dirname(os.path.dirname(path)) for path in tool_paths)
+    ):
+        paths += sorted(
+            os.path.join(domain_dir, file_name)
+            for file_name in os.listdir(domain_dir)
+            if file_name.endswith(".py")
+        )
+    paths += [
+        inspect.getfile(importlib.import_module(module)) for module in ENGINE_MODULES
+    ]
+    fingerprint = hashlib.sha256(f"v{GT_CACHE_VERSION}".encode("utf-8"))
+    for path in paths:
+        fingerprint.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            fingerprint.update(hashlib.sha256(f.read()).digest())
+    return fingerprint.hexdigest()
+
+
+class GroundTruthCache(object):
+    """Ground truth data hashes of one (env, task split), persisted as a JSON file.
+
+    Entries are keyed by task index and carry a digest of the task's actions, so
+    edited tasks are recomputed. The whole file is discarded when the fingerprint
+    of the data files, the tools or the env engine changes.
+    """
+
+    def __init__(self, path: str, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, str]] = self.read_entries()
+
+    def read_entries(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, "r") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (
+            content.get("version") != GT_CACHE_VERSION
+            or content.get("fingerprint") != self.fingerprint
+        ):
+            return {}
+        return content.get("entries", {})
+
+    def get(self, task_index: int, digest: str) -> Optional[str]:
+        entry = self.entries.get(str(task_index))
+        if entry is None or entry["actions_digest"] != digest:
+            return None
+        return entry["gt_data_hash"]
+
+    def put(
+        self, task_index: int, digest: str, gt_data_hash: str, save: bool = True
+    ) -> None:
+        with self.lock:
+            self.entries[str(task_index)] = {
+                "actions_digest": digest,
+                "gt_data_hash": gt_data_hash,
+            }
+            if save:
+                self.save_locked()
+
+    def save(self) -> None:
+        with self.lock:
+            self.save_locked()
+
+    def save_locked(self) -> None:
+        # merge with entries written by other processes since we last read the file
+        self.entries = {**self.read_entries(), **self.entries}
+        content = {
+            "version": GT_CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "entries": self.entries,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.path), suffix=".tmp"
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump(content, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # the cache is an optimization, so a read-only cache dir is not an error
+            pass
+
+
+_caches: Dict[str, GroundTruthCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_gt_cache(
+    env_name: str,
+    task_split: str,
+    data_load_func: Callable[[], Dict[str, Any]],
+    tools: List[Type[Tool]],
+) -> GroundTruthCache:
+    key = f"{env_name}-{task_split}"
+    if DATA_DIR_ENV_VAR in os.environ:
+        # keep the hashes of each database apart instead of invalidating them in turn
+        data_dir = os.path.abspath(get_data_dir(data_load_func))
+        key += "-" + hashlib.sha256(data_dir.encode("utf-8")).hexdigest()[:12]
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = GroundTruthCache(
+                path=os.path.join(get_cache_dir(), "gt_data_hashes", f"{key}.json"),
+                fingerprint=compute_fingerprint(data_load_func, tools),
+            )
+        return _caches[key]
@@ -0,0 +1,95 @@
+# Copyright Sierra
+
+from collections.abc import Mapping
+from hashlib import sha256
+from typing import Any, Dict, List, Set, Tuple, Union
+
+from tau_bench.envs.snapshot import TableOverlay
+
+ToHashable = Union[
+    str, int, float, Dict[str, "ToHashable"], List["ToHashable"], Set["ToHashable"]
+]
+Hashable = Union[str, int, float, Tuple["Hashable"], Tuple[Tuple[str, "Hashable"]]]
+
+DIGEST_MASK = (1 << 256) - 1
+
+
+def to_hashable(item: ToHashable) -> Hashable:
+    if isinstance(item, (dict, Mapping)):
+        return tuple((key, to_hashable(value)) for key, value in sorted(item.items()))
+    elif isinstance(item, list):
+        return tuple(to_hashable(element) for element in item)
+    elif isinstance(item, set):
+        return tuple(sorted(to_hashable(element) for element in item))
+    else:
+        return item
+
+
+def consistent_hash(
+    value: Hashable,
+) -> str:
+    return sha256(str(value).encode("utf-8")).hexdigest()
+
+
+def record_digest(key: str, record: Any) -> int:
+    return int.from_bytes(
+        sha256(str((key, to_hashable(record))).encode("utf-8")).digest(), "big"
+    )
+
+
+def get_base_digests(table: TableOverlay) -> Dict[str, int]:
+    return table.cache.get(
+        "record_digests",
+        lambda: {key: record_digest(key, record) for key, record in table.base.items()},
+    )
+
+
+def table_digest_sum(table: Union[TableOverlay, Dict[str, Any]]) -> int:
+    """Combines the digests of all (key, record) pairs of a table.
+
+    The digests are added modulo 2**256, so the result does not depend on the key
+    order and a record can be swapped out in O(1). For an overlay, the digests of
+    the snapshot are computed once and shared by every fork, and only the records
+    marked dirty since the last call are rehashed.
+    """
+    if not isinstance(table, TableOverlay):
+        return (
+            sum(record_digest(key, record) for key, record in table.items())
+            & DIGEST_MASK
+        )
+    base_digests = get_base_digests(table)
+    base_sum = table.cache.get(
+        "digest_sum", lambda: sum(base_digests.values()) & DIGEST_MASK
+    )
+    for key in table.dirty:
+        if key in table.records:
+            table.digests[key] = record_digest(key, table.records[key])
+        else:
+            table.digests.pop(key, None)
+    table.dirty.clear()
+    total = base_sum
+    for key in table.deleted.union(table.records):
+        if key in base_digests:
+            total -= base_digests[key]
+    total += sum(table.digests.values())
+    return total & DIGEST_MASK
+
+
+def hash_data(data: Dict[str, Any]) -> str:
+    """A Merkle-style hash of a database: sha256 over the digest of each table.
+
+    Two databases hash equal exactly when `consistent_hash(to_hashable(...))` of
+    them would, up to hash collisions.
+    """
+    root = sha256()
+    for name in sorted(data):
+        table = data[name]
+        if isinstance(table, (dict, TableOverlay)):
+            root.update(
+                f"table:{name}:{table_digest_sum(table):064x}\n".encode("utf-8")
+            )
+        else:
+            root.update(
+                f"value:{name}:{consistent_hash(to_hashable(table))}\n".encode("utf-8")
+            )
+    return root.hexdigest()
@@ -1,19 +1,19 @@
-import json
 import os
 from typing import Any
 
+from tau_bench.envs.compiled_data import get_data_folder, load_tables
+
 FOLDER_PATH = os.path.dirname(__file__)
+TABLE_FILES = {
+    "patients": "patients.json",
+    "appointments": "appointments.json",
+    "test_results": "test_results.json",
+}
+
+
+def get_folder_path() -> str:
+    return get_data_folder("healthcare", FOLDER_PATH)
 
 
 def load_data() -> dict[str, Any]:
-    with open(os.path.join(FOLDER_PATH, "patients.json")) as f:
-        patient_data = json.load(f)
-    with open(os.path.join(FOLDER_PATH, "appointments.json")) as f:
-        appointment_data = json.load(f)
-    with open(os.path.join(FOLDER_PATH, "test_results.json")) as f:
-        test_result_data = json.load(f)
-    return {
-        "patients": patient_data,
-        "appointments": appointment_data,
-        "test_results": test_result_data,
-    }
\ No newline at end of file
+    return load_tables(get_folder_path(), TABLE_FILES)
@@ -3,7 +3,7 @@ from tau_bench.envs.healthcare.data import load_data
 from tau_bench.envs.healthcare.rules import RULES
 from tau_bench.envs.healthcare.tools import ALL_TOOLS
 from tau_bench.envs.healthcare.wiki import WIKI
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from tau_bench.envs.user import UserStrategy
 
 
@@ -15,6 +15,7 @@ class MockHealthcareDomainEnv(Env):
         user_provider: Optional[str] = None,
         task_split: str = "test",
         task_index: Optional[int] = None,
+        user_options: Optional[Dict[str, Any]] = None,
     ):
         match task_split:
             case "test":
@@ -31,5 +32,8 @@ class MockHealthcareDomainEnv(Env):
             user_model=user_model,
             user_provider=user_provider,
             task_index=task_index,
+            env_name="healthcare",
+            task_split=task_split,
+            user_options=user_options,
         )
         self.terminate_tools = ["transfer_to_medical_staff"]
\ No newline at end of file
@@ -0,0 +1,17 @@
+# Copyright Sierra
+
+from typing import Any, Dict, List
+
+from tau_bench.envs.indexes import lookup
+
+
+def patient_id_key(record: Dict[str, Any]) -> str:
+    return record["patient_id"]
+
+
+def find_appointment_ids(appointments: Dict[str, Any], patient_id: str) -> List[str]:
+    return lookup(appointments, "appointments_by_patient", patient_id_key, patient_id)
+
+
+def find_test_ids(test_results: Dict[str, Any], patient_id: str) -> List[str]:
+    return lookup(test_results, "tests_by_patient", patient_id_key, patient_id)
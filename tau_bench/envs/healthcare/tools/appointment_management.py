@@ -2,6 +2,8 @@
 Healthcare domain tools for appointment management.
 """
 
+from tau_bench.envs.healthcare.indexes import find_appointment_ids
+from tau_bench.envs.indexes import peek
 from tau_bench.envs.tool import Tool
 from typing import Dict, Any
 
@@ -9,6 +11,8 @@ from typing import Dict, Any
 class GetAppointmentDetails(Tool):
     """Tool to get appointment details."""
     
+    read_only = True
+    
     @classmethod
     def get_info(cls) -> Dict[str, Any]:
         return {
@@ -49,15 +53,15 @@ class GetAppointmentDetails(Tool):
             return f"Appointment {appointment_id}: Patient {appt['patient_id']}, Doctor: {appt['doctor']}, Date: {appt['date']}, Time: {appt['time']}, Type: {appt['type']}, Status: {appt['status']}"
         else:
             # Return all appointments for the patient
-            patient_appointments = [appt for appt in appointments.values() if appt["patient_id"] == patient_id]
+            patient_appointment_ids = find_appointment_ids(appointments, patient_id)
             
-            if not patient_appointments:
+            if not patient_appointment_ids:
                 return f"No appointments found for patient {patient_id}."
             
             results = []
-            for appt_id, appt in appointments.items():
-                if appt["patient_id"] == patient_id:
-                    results.append(f"Appointment {appt_id}: Doctor: {appt['doctor']}, Date: {appt['date']}, Time: {appt['time']}, Type: {appt['type']}, Status: {appt['status']}")
+            for appt_id in patient_appointment_ids:
+                appt = peek(appointments, appt_id)
+                results.append(f"Appointment {appt_id}: Doctor: {appt['doctor']}, Date: {appt['date']}, Time: {appt['time']}, Type: {appt['type']}, Status: {appt['status']}")
             
             return "\n".join(results)
 
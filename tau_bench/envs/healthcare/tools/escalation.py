@@ -9,6 +9,8 @@ from typing import Dict, Any
 class TransferToMedicalStaff(Tool):
     """Tool to transfer conversation to medical staff."""
     
+    read_only = True
+    
     @classmethod
     def get_info(cls) -> Dict[str, Any]:
         return {
@@ -2,6 +2,8 @@
 Healthcare domain tools for medical records.
 """
 
+from tau_bench.envs.healthcare.indexes import find_test_ids
+from tau_bench.envs.indexes import peek
 from tau_bench.envs.tool import Tool
 from typing import Dict, Any
 
@@ -9,6 +11,8 @@ from typing import Dict, Any
 class GetTestResults(Tool):
     """Tool to get patient test results."""
     
+    read_only = True
+    
     @classmethod
     def get_info(cls) -> Dict[str, Any]:
         return {
@@ -49,14 +53,14 @@ class GetTestResults(Tool):
             return f"Test {test_id}: {test['test_type']} on {test['date']}, Results: {test['results']}, Doctor: {test['doctor']}"
         else:
             # Return all tests for the patient
-            patient_tests = [test for test in test_results.values() if test["patient_id"] == patient_id]
+            patient_test_ids = find_test_ids(test_results, patient_id)
             
-            if not patient_tests:
+            if not patient_test_ids:
                 return f"No test results found for patient {patient_id}."
             
             results = []
-            for test_id, test in test_results.items():
-                if test["patient_id"] == patient_id:
-                    results.append(f"Test {test_id}: {test['test_type']} on {test['date']}, Results: {test['results']}")
+            for test_id in patient_test_ids:
+                test = peek(test_results, test_id)
+                results.append(f"Test {test_id}: {test['test_type']} on {test['date']}, Results: {test['results']}")
             
             return "\n".join(results)
\ No newline at end of file
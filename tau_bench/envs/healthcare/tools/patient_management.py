@@ -9,6 +9,8 @@ from typing import Dict, Any
 class GetPatientInfo(Tool):
     """Tool to get patient information."""
     
+    read_only = True
+    
     @classmethod
     def get_info(cls) -> Dict[str, Any]:
         return {
@@ -0,0 +1,80 @@
+# Copyright Sierra
+
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Union
+
+from tau_bench.envs.snapshot import TableOverlay
+
+KeyFunc = Callable[[Any], Hashable]
+
+
+def build_index(table: Mapping[str, Any], key_fn: KeyFunc) -> Dict[Hashable, List[str]]:
+    index: Dict[Hashable, List[str]] = {}
+    for record_key, record in table.items():
+        index.setdefault(key_fn(record), []).append(record_key)
+    return index
+
+
+def get_base_positions(table: TableOverlay) -> Dict[str, int]:
+    return table.cache.get(
+        "positions", lambda: {key: i for i, key in enumerate(table.base)}
+    )
+
+
+def lookup(
+    table: Union[TableOverlay, Dict[str, Any]],
+    name: str,
+    key_fn: KeyFunc,
+    key: Hashable,
+) -> List[str]:
+    """Keys of the records of `table` with `key_fn(record) == key`, in table order.
+
+    For an overlay, the index of the snapshot table is built once under `name` and
+    shared by every fork. Records that a fork copied, wrote or deleted are checked
+    against `key_fn` again, so the result always matches a scan of the table.
+    """
+    if not isinstance(table, TableOverlay):
+        return [
+            record_key for record_key, record in table.items() if key_fn(record) == key
+        ]
+    index = table.cache.get(name, lambda: build_index(table.base, key_fn))
+    return patch_base_keys(
+        table, index.get(key, []), lambda record: key_fn(record) == key
+    )
+
+
+def patch_base_keys(
+    table: TableOverlay, base_keys: List[str], predicate: Callable[[Any], bool]
+) -> List[str]:
+    """Corrects the keys of the snapshot records that match a query for one fork.
+
+    Records the fork has copied, written or deleted are dropped from `base_keys`,
+    and the ones still present are matched with `predicate` instead.
+    """
+    if not table.records and not table.deleted:
+        return list(base_keys)
+    record_keys = [
+        record_key
+        for record_key in base_keys
+        if record_key not in table.records and record_key not in table.deleted
+    ]
+    record_keys += [
+        record_key for record_key, record in table.records.items() if predicate(record)
+    ]
+    # restore the iteration order of the table: base keys first, then added keys
+    base_positions = get_base_positions(table)
+    added_positions = {record_key: i for i, record_key in enumerate(table.added)}
+    return sorted(
+        record_keys,
+        key=lambda record_key: (
+            added_positions[record_key] + len(base_positions)
+            if record_key in added_positions
+            else base_positions[record_key]
+        ),
+    )
+
+
+def peek(table: Union[TableOverlay, Dict[str, Any]], key: str) -> Any:
+    """Reads a record without copying it out of the snapshot, so it must not be mutated."""
+    if isinstance(table, TableOverlay):
+        return table.peek(key)
+    return table[key]
@@ -0,0 +1,69 @@
+# Copyright Sierra
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tau_bench.envs.snapshot import TableOverlay
+
+# (table name, key or None for the whole table, version of the table when it was read)
+Dependency = Tuple[str, Optional[str], int]
+
+
+class ToolMemo(object):
+    """Observations of the read-only tools called in one episode, keyed by tool name and arguments.
+
+    Each observation remembers the keys it read in each table, or that it read a
+    whole table (by iterating over it or through a snapshot index). It is reused
+    until one of those keys, or any key of a whole table it read, is written.
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[Tuple[str, str], Tuple[str, List[Dependency]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_valid(self, data: Dict[str, Any], dependencies: List[Dependency]) -> bool:
+        for table_name, key, version in dependencies:
+            table = data[table_name]
+            if key is None:
+                if table.version != version:
+                    return False
+            elif table.key_versions.get(key, 0) > version:
+                return False
+        return True
+
+    def invoke(
+        self,
+        data: Dict[str, Any],
+        tool_name: str,
+        kwargs: Dict[str, Any],
+        run: Callable[[], str],
+    ) -> str:
+        tables = {
+            name: table
+            for name, table in data.items()
+            if isinstance(table, TableOverlay)
+        }
+        if len(tables) != len(data):
+            # reads of other tables cannot be tracked
+            return run()
+        entry_key = (tool_name, json.dumps(kwargs, sort_keys=True, default=str))
+        entry = self.entries.get(entry_key)
+        if entry is not None and self.is_valid(data, entry[1]):
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        for table in tables.values():
+            table.track_reads()
+        try:
+            observation = run()
+        finally:
+            dependencies: List[Dependency] = []
+            for name, table in tables.items():
+                reads, read_all = table.stop_tracking()
+                if read_all:
+                    dependencies.append((name, None, table.version))
+                else:
+                    dependencies += [(name, key, table.version) for key in reads]
+        self.entries[entry_key] = (observation, dependencies)
+        return observation
@@ -0,0 +1,64 @@
+# Copyright Sierra
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from tau_bench.envs import get_env
+from tau_bench.envs.base import Env
+from tau_bench.envs.user import UserStrategy
+
+
+class EnvPool(object):
+    """Envs of one configuration, reused across tasks.
+
+    An env is checked out for a single episode at a time. `Env.reset` forks fresh
+    data and resets the user, so a released env can run any other task, and the
+    pool only grows to the number of episodes that run concurrently.
+    """
+
+    def __init__(
+        self,
+        env_name: str,
+        user_strategy: Union[str, UserStrategy],
+        user_model: str,
+        task_split: str,
+        user_provider: Optional[str] = None,
+        user_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.env_name = env_name
+        self.user_strategy = user_strategy
+        self.user_model = user_model
+        self.task_split = task_split
+        self.user_provider = user_provider
+        self.user_options = user_options
+        self.idle: List[Env] = []
+        self.num_created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, task_index: Optional[int] = None) -> Env:
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.num_created += 1
+        return get_env(
+            self.env_name,
+            user_strategy=self.user_strategy,
+            user_model=self.user_model,
+            task_split=self.task_split,
+            user_provider=self.user_provider,
+            task_index=task_index,
+            user_options=self.user_options,
+        )
+
+    def release(self, env: Env) -> None:
+        with self.lock:
+            self.idle.append(env)
+
+    @contextmanager
+    def checkout(self, task_index: Optional[int] = None) -> Iterator[Env]:
+        env = self.acquire(task_index=task_index)
+        try:
+            yield env
+        finally:
+            self.release(env)
@@ -0,0 +1,43 @@
+# Copyright Sierra
+
+import json
+from typing import Any, Dict, Mapping, Union
+
+from tau_bench.envs.snapshot import TableOverlay
+
+
+def serialize_product_types(products: Mapping[str, Any]) -> str:
+    product_dict = {
+        product["name"]: product["product_id"] for product in products.values()
+    }
+    product_dict = dict(sorted(product_dict.items()))
+    return json.dumps(product_dict)
+
+
+def is_untouched(products: TableOverlay) -> bool:
+    return not products.records and not products.deleted and not products.added
+
+
+def list_all_product_types(products: Union[TableOverlay, Dict[str, Any]]) -> str:
+    """The JSON of the product name to product id map, serialized once per snapshot while no fork has touched the products."""
+    if isinstance(products, TableOverlay) and is_untouched(products):
+        return products.cache.get(
+            "product_types_json", lambda: serialize_product_types(products.base)
+        )
+    return serialize_product_types(products)
+
+
+def get_product_json(
+    products: Union[TableOverlay, Dict[str, Any]], product_id: str
+) -> str:
+    """The JSON of one product, serialized once per snapshot until a fork touches that product."""
+    if (
+        isinstance(products, TableOverlay)
+        and product_id not in products.records
+        and product_id not in products.deleted
+    ):
+        serialized: Dict[str, str] = products.cache.get("product_json", dict)
+        if product_id not in serialized:
+            serialized[product_id] = json.dumps(products.base[product_id])
+        return serialized[product_id]
+    return json.dumps(products[product_id])
@@ -5,7 +5,7 @@ from tau_bench.envs.retail.data import load_data
 from tau_bench.envs.retail.rules import RULES
 from tau_bench.envs.retail.tools import ALL_TOOLS
 from tau_bench.envs.retail.wiki import WIKI
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 from tau_bench.envs.user import UserStrategy
 
 
@@ -17,6 +17,7 @@ class MockRetailDomainEnv(Env):
         user_provider: Optional[str] = None,
         task_split: str = "test",
         task_index: Optional[int] = None,
+        user_options: Optional[Dict[str, Any]] = None,
     ):
         match task_split:
             case "test":
@@ -37,5 +38,8 @@ class MockRetailDomainEnv(Env):
             user_model=user_model,
             user_provider=user_provider,
             task_index=task_index,
+            env_name="retail",
+            task_split=task_split,
+            user_options=user_options,
         )
         self.terminate_tools = ["transfer_to_human_agents"]
@@ -0,0 +1,34 @@
+# Copyright Sierra
+
+from typing import Any, Dict, Optional
+
+from tau_bench.envs.indexes import lookup
+
+
+def user_name_zip_key(profile: Dict[str, Any]) -> Any:
+    return (
+        profile["name"]["first_name"].lower(),
+        profile["name"]["last_name"].lower(),
+        profile["address"]["zip"],
+    )
+
+
+def user_email_key(profile: Dict[str, Any]) -> str:
+    return profile["email"].lower()
+
+
+def find_user_id_by_name_zip(
+    users: Dict[str, Any], first_name: str, last_name: str, zip: str
+) -> Optional[str]:
+    user_ids = lookup(
+        users,
+        "users_by_name_zip",
+        user_name_zip_key,
+        (first_name.lower(), last_name.lower(), zip),
+    )
+    return user_ids[0] if user_ids else None
+
+
+def find_user_id_by_email(users: Dict[str, Any], email: str) -> Optional[str]:
+    user_ids = lookup(users, "users_by_email", user_email_key, email.lower())
+    return user_ids[0] if user_ids else None
@@ -3,6 +3,7 @@
 import json
 from typing import Any, Dict, List
 
+from tau_bench.envs.indexes import peek
 from tau_bench.envs.tool import Tool
 
 
@@ -39,13 +40,13 @@ class ExchangeDeliveredOrderItems(Tool):
             item = [item for item in order["items"] if item["item_id"] == item_id][0]
             product_id = item["product_id"]
             if not (
-                new_item_id in products[product_id]["variants"]
-                and products[product_id]["variants"][new_item_id]["available"]
+                new_item_id in peek(products, product_id)["variants"]
+                and peek(products, product_id)["variants"][new_item_id]["available"]
             ):
                 return f"Error: new item {new_item_id} not found or available"
 
             old_price = item["price"]
-            new_price = products[product_id]["variants"][new_item_id]["price"]
+            new_price = peek(products, product_id)["variants"][new_item_id]["price"]
             diff_price += new_price - old_price
 
         diff_price = round(diff_price, 2)
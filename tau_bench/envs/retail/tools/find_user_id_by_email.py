@@ -1,17 +1,20 @@
 # Copyright Sierra
 
 from typing import Any, Dict
+from tau_bench.envs.retail.indexes import find_user_id_by_email
 from tau_bench.envs.tool import Tool
 
 
 class FindUserIdByEmail(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], email: str) -> str:
         users = data["users"]
-        for user_id, profile in users.items():
-            if profile["email"].lower() == email.lower():
-                return user_id
-        return "Error: user not found"
+        user_id = find_user_id_by_email(users, email)
+        if user_id is None:
+            return "Error: user not found"
+        return user_id
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,21 +1,20 @@
 # Copyright Sierra
 
 from typing import Any, Dict
+from tau_bench.envs.retail.indexes import find_user_id_by_name_zip
 from tau_bench.envs.tool import Tool
 
 
 class FindUserIdByNameZip(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], first_name: str, last_name: str, zip: str) -> str:
         users = data["users"]
-        for user_id, profile in users.items():
-            if (
-                profile["name"]["first_name"].lower() == first_name.lower()
-                and profile["name"]["last_name"].lower() == last_name.lower()
-                and profile["address"]["zip"] == zip
-            ):
-                return user_id
-        return "Error: user not found"
+        user_id = find_user_id_by_name_zip(users, first_name, last_name, zip)
+        if user_id is None:
+            return "Error: user not found"
+        return user_id
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
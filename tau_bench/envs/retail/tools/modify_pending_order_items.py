@@ -2,6 +2,7 @@
 
 import json
 from typing import Any, Dict, List
+from tau_bench.envs.indexes import peek
 from tau_bench.envs.tool import Tool
 
 
@@ -38,13 +39,13 @@ class ModifyPendingOrderItems(Tool):
             item = [item for item in order["items"] if item["item_id"] == item_id][0]
             product_id = item["product_id"]
             if not (
-                new_item_id in products[product_id]["variants"]
-                and products[product_id]["variants"][new_item_id]["available"]
+                new_item_id in peek(products, product_id)["variants"]
+                and peek(products, product_id)["variants"][new_item_id]["available"]
             ):
                 return f"Error: new item {new_item_id} not found or available"
 
             old_price = item["price"]
-            new_price = products[product_id]["variants"][new_item_id]["price"]
+            new_price = peek(products, product_id)["variants"][new_item_id]["price"]
             diff_price += new_price - old_price
 
         # Check if the payment method exists
@@ -75,12 +76,10 @@ class ModifyPendingOrderItems(Tool):
         for item_id, new_item_id in zip(item_ids, new_item_ids):
             item = [item for item in order["items"] if item["item_id"] == item_id][0]
             item["item_id"] = new_item_id
-            item["price"] = products[item["product_id"]]["variants"][new_item_id][
-                "price"
-            ]
-            item["options"] = products[item["product_id"]]["variants"][new_item_id][
-                "options"
-            ]
+            variant = peek(products, item["product_id"])["variants"][new_item_id]
+            item["price"] = variant["price"]
+            # the product is read from the shared snapshot, so the order gets its own copy
+            item["options"] = dict(variant["options"])
         order["status"] = "pending (item modified)"
 
         return json.dumps(order)
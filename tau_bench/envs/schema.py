@@ -0,0 +1,149 @@
+# Copyright Sierra
+
+import functools
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from tau_bench.envs.tool import Tool
+
+# returns the path to the first invalid value and an error message, or None if the value is valid
+Validator = Callable[[Any], Optional[Tuple[str, str]]]
+
+JSON_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    # bool is a subclass of int, but not a JSON number
+    "integer": lambda value: (
+        isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+    )
+    and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "null": lambda value: value is None,
+}
+
+
+def describe_type(value: Any) -> str:
+    for name in ["boolean", "integer", "number", "string", "object", "array", "null"]:
+        if JSON_TYPES[name](value):
+            return name
+    return type(value).__name__
+
+
+def join_path(name: str, path: str) -> str:
+    # paths are only built for errors, which keeps valid calls cheap
+    if not path or path.startswith("["):
+        return name + path
+    return f"{name}.{path}"
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Compiles a JSON schema into a validator, once, so that checking a value is a few function calls.
+
+    Only the keywords used by the tool schemas are supported: `type`, `enum`,
+    `properties`, `required`, `additionalProperties` (as a boolean) and `items`.
+    """
+    checks: List[Validator] = []
+
+    if "type" in schema:
+        type_names = (
+            schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        )
+        type_checks = [JSON_TYPES[name] for name in type_names]
+        expected = " or ".join(type_names)
+
+        def check_type(value: Any) -> Optional[Tuple[str, str]]:
+            for type_check in type_checks:
+                if type_check(value):
+                    return None
+            return "", f"expected {expected}, got {describe_type(value)}"
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        choices = list(schema["enum"])
+
+        def check_enum(value: Any) -> Optional[Tuple[str, str]]:
+            if value in choices:
+                return None
+            return "", f"{value!r} is not one of {choices}"
+
+        checks.append(check_enum)
+
+    if "properties" in schema or "required" in schema:
+        properties = {
+            name: compile_schema(property_schema)
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+        required = list(schema.get("required", []))
+        allow_additional = schema.get("additionalProperties", True) is not False
+
+        def check_properties(value: Any) -> Optional[Tuple[str, str]]:
+            if not isinstance(value, dict):
+                return None
+            for name in required:
+                if name not in value:
+                    return "", f"missing required property {name!r}"
+            for name, item in value.items():
+                validator = properties.get(name)
+                if validator is not None:
+                    error = validator(item)
+                    if error is not None:
+                        return join_path(name, error[0]), error[1]
+                elif not allow_additional:
+                    return "", f"unexpected property {name!r}"
+            return None
+
+        checks.append(check_properties)
+
+    if "items" in schema:
+        item_validator = compile_schema(schema["items"])
+
+        def check_items(value: Any) -> Optional[Tuple[str, str]]:
+            if not isinstance(value, list):
+                return None
+            for i, item in enumerate(value):
+                error = item_validator(item)
+                if error is not None:
+                    return join_path(f"[{i}]", error[0]), error[1]
+            return None
+
+        checks.append(check_items)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any) -> Optional[Tuple[str, str]]:
+        for check in checks:
+            error = check(value)
+            if error is not None:
+                return error
+        return None
+
+    return check_all
+
+
+@functools.lru_cache(maxsize=None)
+def get_arguments_validator(
+    tool: Type[Tool],
+) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """The validator of the arguments of `tool`, compiled from the parameters in its `get_info`.
+
+    The parameters list every argument of `invoke`, so other arguments are rejected
+    instead of raising a TypeError in the call.
+    """
+    info = tool.get_info()["function"]
+    validator = compile_schema(
+        dict(info.get("parameters", {}), type="object", additionalProperties=False)
+    )
+    name = info["name"]
+
+    def validate_arguments(arguments: Dict[str, Any]) -> Optional[str]:
+        error = validator(arguments)
+        if error is None:
+            return None
+        path, message = error
+        return f"Invalid arguments for {name}: {path + ': ' if path else ''}{message}"
+
+    return validate_arguments
@@ -0,0 +1,289 @@
+# Copyright Sierra
+
+import threading
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
+
+DataLoadFunc = Callable[[], Dict[str, Any]]
+T = TypeVar("T")
+# marks journaled keys that had no record of their own before the transaction
+NOT_COPIED = object()
+
+
+def copy_record(value: Any) -> Any:
+    # a deepcopy specialized to the JSON values that make up the databases
+    if isinstance(value, dict):
+        return {key: copy_record(item) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [copy_record(item) for item in value]
+    return value
+
+
+class TableCache(object):
+    """Values derived from one snapshot table, built once and shared by all of its forks."""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str, build: Callable[[], T]) -> T:
+        if name in self.values:
+            return self.values[name]
+        with self.lock:
+            if name not in self.values:
+                self.values[name] = build()
+            return self.values[name]
+
+
+class TableOverlayItemsView(ItemsView):
+    def __iter__(self):
+        table = self._mapping
+        for key in table:
+            yield key, table.peek(key)
+
+
+class TableOverlayValuesView(ValuesView):
+    def __iter__(self):
+        table = self._mapping
+        for key in table:
+            yield table.peek(key)
+
+
+class TableOverlay(MutableMapping):
+    """A copy-on-write view over one table of a shared `DataSnapshot`.
+
+    A record is copied out of the snapshot the first time it is looked up by key,
+    so tools can mutate whatever `table[key]` returns. Records yielded by
+    `values()` and `items()` are shared with the snapshot until they have been
+    copied, and must be treated as read-only.
+
+    Keys that are looked up, written or deleted are marked dirty so that
+    `hashing.hash_data` only rehashes those records.
+
+    Between `begin` and `commit`, the first lookup, write or delete of each key
+    saves what the key held before in a journal, and `rollback` restores it.
+
+    Lookups are counted as writes, since tools mutate the records they look up,
+    except between `track_reads` and `stop_tracking`, which collect the keys that
+    a read-only tool reads. Writes move the key and the table to a new `version`.
+    """
+
+    def __init__(
+        self, base: Dict[str, Any], cache: Optional[TableCache] = None
+    ) -> None:
+        self.base = base
+        self._cache = cache if cache is not None else TableCache()
+        # records copied out of the base table or written by tools
+        self.records: Dict[str, Any] = {}
+        # keys that iterate after the base keys, in insertion order
+        self.added: Dict[str, None] = {}
+        # base keys that were deleted (and possibly re-added at the end)
+        self.deleted: Set[str] = set()
+        self.dirty: Set[str] = set()
+        # digests of the records in `records`, maintained by `hashing.table_digest_sum`
+        self.digests: Dict[str, int] = {}
+        # for each key touched in the open transaction: its record before (or
+        # NOT_COPIED) and whether it was deleted, or None outside of a transaction
+        self.journal: Optional[Dict[str, Tuple[Any, bool]]] = None
+        # `added` before its first change in the open transaction
+        self.journal_added: Optional[Dict[str, None]] = None
+        # incremented by every write, and the version of the last write to each key
+        self.version = 0
+        self.key_versions: Dict[str, int] = {}
+        # the keys read since `track_reads`, and whether the whole table was read
+        self.reads: Optional[Set[str]] = None
+        self.read_all = False
+
+    @property
+    def cache(self) -> TableCache:
+        # the shared caches answer queries over the whole table
+        if self.reads is not None:
+            self.read_all = True
+        return self._cache
+
+    def track_reads(self) -> None:
+        self.reads = set()
+        self.read_all = False
+
+    def stop_tracking(self) -> Tuple[Set[str], bool]:
+        assert self.reads is not None, "Reads are not being tracked"
+        reads, read_all = self.reads, self.read_all
+        self.reads = None
+        self.read_all = False
+        return reads, read_all
+
+    def touch(self, key: str) -> None:
+        if self.reads is not None:
+            self.reads.add(key)
+            self.dirty.add(key)
+        else:
+            self.mark_written(key)
+
+    def mark_written(self, key: str) -> None:
+        self.dirty.add(key)
+        self.version += 1
+        self.key_versions[key] = self.version
+
+    def begin(self) -> None:
+        assert self.journal is None, "Transactions cannot be nested"
+        self.journal = {}
+        self.journal_added = None
+
+    def commit(self) -> None:
+        self.journal = None
+        self.journal_added = None
+
+    def rollback(self) -> None:
+        """Undoes the lookups, writes and deletes since `begin`, in time proportional to the keys they touched."""
+        assert self.journal is not None, "No transaction to roll back"
+        for key, (record, deleted) in self.journal.items():
+            if record is NOT_COPIED:
+                self.records.pop(key, None)
+            else:
+                self.records[key] = record
+            if deleted:
+                self.deleted.add(key)
+            else:
+                self.deleted.discard(key)
+            self.mark_written(key)
+        if self.journal_added is not None:
+            self.added = self.journal_added
+        self.commit()
+
+    def save(self, key: str, changes_added: bool = False) -> None:
+        # copying only the records that are touched keeps rollbacks cheap
+        if key not in self.journal:
+            self.journal[key] = (
+                copy_record(self.records[key]) if key in self.records else NOT_COPIED,
+                key in self.deleted,
+            )
+        if changes_added and self.journal_added is None:
+            self.journal_added = dict(self.added)
+
+    def peek(self, key: str) -> Any:
+        if self.reads is not None and not self.read_all:
+            self.reads.add(key)
+        if key in self.records:
+            return self.records[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __getitem__(self, key: str) -> Any:
+        if self.journal is not None:
+            self.save(key)
+        if key in self.records:
+            self.touch(key)
+            return self.records[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        record = self.records[key] = copy_record(self.base[key])
+        self.touch(key)
+        return record
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self.journal is not None:
+            self.save(key, changes_added=True)
+        if key in self.deleted or key not in self.base:
+            self.added.setdefault(key, None)
+        self.records[key] = value
+        self.mark_written(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        if self.journal is not None:
+            self.save(key, changes_added=True)
+        self.records.pop(key, None)
+        self.added.pop(key, None)
+        if key in self.base:
+            self.deleted.add(key)
+        self.mark_written(key)
+
+    def __contains__(self, key: object) -> bool:
+        if self.reads is not None:
+            self.reads.add(key)
+        if key in self.records:
+            return True
+        return key in self.base and key not in self.deleted
+
+    def __iter__(self) -> Iterator[str]:
+        if self.reads is not None:
+            self.read_all = True
+        if self.deleted:
+            for key in self.base:
+                if key not in self.deleted:
+                    yield key
+        else:
+            yield from self.base
+        yield from self.added
+
+    def __len__(self) -> int:
+        if self.reads is not None:
+            self.read_all = True
+        return len(self.base) - len(self.deleted) + len(self.added)
+
+    def items(self) -> TableOverlayItemsView:
+        return TableOverlayItemsView(self)
+
+    def values(self) -> TableOverlayValuesView:
+        return TableOverlayValuesView(self)
+
+
+class DataSnapshot(object):
+    """An immutable, process-wide copy of a domain database.
+
+    `fork` returns a fresh mutable view of the database that costs about as much
+    as creating one empty dict per table. Nothing may write to `tables` directly.
+    """
+
+    def __init__(self, tables: Dict[str, Any]) -> None:
+        self.tables = tables
+        self.caches = {name: TableCache() for name in tables}
+
+    def fork(self) -> Dict[str, Any]:
+        return {
+            name: (
+                TableOverlay(table, cache=self.caches[name])
+                if isinstance(table, dict)
+                else copy_record(table)
+            )
+            for name, table in self.tables.items()
+        }
+
+
+_snapshots: Dict[DataLoadFunc, DataSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def load_snapshot(data_load_func: DataLoadFunc) -> DataSnapshot:
+    snapshot = _snapshots.get(data_load_func)
+    if snapshot is None:
+        with _snapshots_lock:
+            snapshot = _snapshots.get(data_load_func)
+            if snapshot is None:
+                snapshot = DataSnapshot(data_load_func())
+                _snapshots[data_load_func] = snapshot
+    return snapshot
+
+
+class Transaction(object):
+    """Makes the writes of a tool call to a forked database all-or-nothing.
+
+    Only `TableOverlay` tables are journaled; the tables of every domain are.
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.tables: List[TableOverlay] = [
+            table for table in data.values() if isinstance(table, TableOverlay)
+        ]
+        for table in self.tables:
+            table.begin()
+
+    def commit(self) -> None:
+        for table in self.tables:
+            table.commit()
+
+    def rollback(self) -> None:
+        for table in self.tables:
+            table.rollback()
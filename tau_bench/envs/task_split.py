@@ -0,0 +1,55 @@
+# Copyright Sierra
+
+import os
+import threading
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Union
+
+from tau_bench.types import Task
+
+
+class LazyTaskSplit(Sequence):
+    """The tasks of a split, stored as one JSON object per line.
+
+    The file is read on first use, and each `Task` is only validated the first
+    time `tasks[i]` is accessed, so importing a split costs nothing and an env
+    that runs a single task never builds the other ones.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self._lines: Optional[List[bytes]] = None
+        self._tasks: Dict[int, Task] = {}
+
+    @property
+    def lines(self) -> List[bytes]:
+        if self._lines is None:
+            with self.lock:
+                if self._lines is None:
+                    with open(self.path, "rb") as f:
+                        self._lines = [line for line in f.read().splitlines() if line]
+        return self._lines
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Task, List[Task]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        lines = self.lines
+        if index < 0:
+            index += len(lines)
+        if not 0 <= index < len(lines):
+            raise IndexError("task index out of range")
+        task = self._tasks.get(index)
+        if task is None:
+            task = self._tasks.setdefault(index, Task.model_validate_json(lines[index]))
+        return task
+
+    def __repr__(self) -> str:
+        return f"LazyTaskSplit({os.path.basename(self.path)!r})"
+
+
+def load_task_split(module_file: str, file_name: str) -> LazyTaskSplit:
+    return LazyTaskSplit(os.path.join(os.path.dirname(module_file), file_name))
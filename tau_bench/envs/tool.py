@@ -3,6 +3,9 @@ from typing import Any
 
 
 class Tool(abc.ABC):
+    # tools that never write to `data` have their observations memoized within an episode
+    read_only: bool = False
+
     @staticmethod
     def invoke(*args, **kwargs):
         raise NotImplementedError
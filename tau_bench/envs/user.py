@@ -1,10 +1,19 @@
 # Copyright Sierra
 
 import abc
+import asyncio
+import contextvars
 import enum
-from litellm import completion
+from concurrent.futures import ThreadPoolExecutor
+from litellm import ModelResponse
+from tau_bench.llm import Role, acompletion, completion, supports_n
 
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Callable, TypeVar, Union
+
+T = TypeVar("T")
+
+# a rough estimate, only used to budget the transcripts sent to the supervisor
+CHARS_PER_TOKEN = 4
 
 
 class BaseUserSimulationEnv(abc.ABC):
@@ -22,6 +31,13 @@ class BaseUserSimulationEnv(abc.ABC):
     def get_total_cost(self) -> float:
         raise NotImplementedError
 
+    async def areset(self, instruction: Optional[str] = None) -> str:
+        # simulators without a native async implementation run in a worker thread
+        return await asyncio.to_thread(self.reset, instruction)
+
+    async def astep(self, content: str) -> str:
+        return await asyncio.to_thread(self.step, content)
+
 
 class HumanUserSimulationEnv(BaseUserSimulationEnv):
     def reset(self, instruction: str) -> str:
@@ -41,17 +57,27 @@ class LLMUserSimulationEnv(BaseUserSimulationEnv):
         self.model = model
         self.provider = provider
         self.total_cost = 0.0
-        self.reset()
 
-    def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
-        res = completion(
-            model=self.model, custom_llm_provider=self.provider, messages=messages
+    def request(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(
+            role=Role.USER,
+            model=self.model,
+            custom_llm_provider=self.provider,
+            messages=messages,
         )
+
+    def accept_response(self, res: ModelResponse) -> str:
         message = res.choices[0].message
         self.messages.append(message.model_dump())
-        self.total_cost = res._hidden_params["response_cost"]
+        self.total_cost += res._hidden_params["response_cost"] or 0
         return message.content
 
+    def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        return self.accept_response(completion(**self.request(messages)))
+
+    async def agenerate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        return self.accept_response(await acompletion(**self.request(messages)))
+
     def build_system_prompt(self, instruction: Optional[str]) -> str:
         instruction_display = (
             ("\n\nInstruction: " + instruction + "\n")
@@ -67,7 +93,9 @@ Rules:
 - Do not repeat the exact instruction in the conversation. Instead, use your own words to convey the same information.
 - Try to make the conversation as natural as possible, and stick to the personalities in the instruction."""
 
-    def reset(self, instruction: Optional[str] = None) -> str:
+    def start_conversation(self, instruction: Optional[str]) -> None:
+        # simulators are reused across episodes
+        self.total_cost = 0.0
         self.messages = [
             {
                 "role": "system",
@@ -75,12 +103,23 @@ Rules:
             },
             {"role": "user", "content": "Hi! How can I help you today?"},
         ]
+
+    def reset(self, instruction: Optional[str] = None) -> str:
+        self.start_conversation(instruction)
         return self.generate_next_message(self.messages)
 
     def step(self, content: str) -> str:
         self.messages.append({"role": "user", "content": content})
         return self.generate_next_message(self.messages)
 
+    async def areset(self, instruction: Optional[str] = None) -> str:
+        self.start_conversation(instruction)
+        return await self.agenerate_next_message(self.messages)
+
+    async def astep(self, content: str) -> str:
+        self.messages.append({"role": "user", "content": content})
+        return await self.agenerate_next_message(self.messages)
+
     def get_total_cost(self) -> float:
         return self.total_cost
 
@@ -88,7 +127,6 @@ Rules:
 class ReactUserSimulationEnv(LLMUserSimulationEnv):
     def __init__(self, model: str, provider: str) -> None:
         super().__init__(model=model, provider=provider)
-        self.reset()
 
     def build_system_prompt(self, instruction: Optional[str]) -> str:
         instruction_display = (
@@ -114,24 +152,8 @@ Thought:
 User Response:
 <the user response (this will be parsed and sent to the agent)>"""
 
-    def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
-        res = completion(
-            model=self.model, custom_llm_provider=self.provider, messages=messages
-        )
-        message = res.choices[0].message
-        self.messages.append(message.model_dump())
-        self.total_cost = res._hidden_params["response_cost"]
-        return self.parse_response(message.content)
-
-    def reset(self, instruction: Optional[str] = None) -> str:
-        self.messages = [
-            {
-                "role": "system",
-                "content": self.build_system_prompt(instruction=instruction),
-            },
-            {"role": "user", "content": "Hi! How can I help you today?"},
-        ]
-        return self.generate_next_message(self.messages)
+    def accept_response(self, res: ModelResponse) -> str:
+        return self.parse_response(super().accept_response(res))
 
     def parse_response(self, response: str) -> str:
         if "###STOP###" in response:
@@ -145,53 +167,91 @@ User Response:
         else:
             raise ValueError(f"Invalid response format: {response}")
 
-    def step(self, content: str) -> str:
-        self.messages.append({"role": "user", "content": content})
-        return self.generate_next_message(self.messages)
-
-    def get_total_cost(self) -> float:
-        return self.total_cost
-
 
 class VerifyUserSimulationEnv(LLMUserSimulationEnv):
-    def __init__(self, model: str, provider: str, max_attempts: int = 3) -> None:
-        self.model = model
-        self.provider = provider
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        max_attempts: int = 3,
+        transcript_tokens: Optional[int] = None,
+        parallel_candidates: bool = False,
+    ) -> None:
+        super().__init__(model=model, provider=provider)
         self.max_attempts = max_attempts
-        self.reset()
+        self.transcript = TranscriptBuffer(max_tokens=transcript_tokens)
+        self.parallel_candidates = parallel_candidates
 
     def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        if self.parallel_candidates:
+            return self.generate_in_parallel(messages)
         attempts = 0
         cur_message = None
+        # every attempt is verified against the same transcript
+        transcript = self.transcript.render(messages)
         while attempts < self.max_attempts:
-            res = completion(
-                model=self.model, custom_llm_provider=self.provider, messages=messages
-            )
+            res = completion(**self.request(messages))
             cur_message = res.choices[0].message
-            self.total_cost = res._hidden_params["response_cost"]
-            if verify(self.model, self.provider, cur_message, messages):
+            self.total_cost += res._hidden_params["response_cost"] or 0
+            if verify(
+                self.model, self.provider, cur_message, messages, transcript=transcript
+            ):
                 self.messages.append(cur_message.model_dump())
                 return cur_message.content
             attempts += 1
         assert cur_message is not None
         return cur_message.content
 
-    def reset(self, instruction: Optional[str] = None) -> str:
-        self.messages = [
-            {
-                "role": "system",
-                "content": self.build_system_prompt(instruction=instruction),
-            },
-            {"role": "user", "content": "Hi! How can I help you today?"},
+    def generate_in_parallel(self, messages: List[Dict[str, Any]]) -> str:
+        """Generates `max_attempts` candidates and verifies them all at once, in two round trips.
+
+        The first accepted candidate in order is sent, which is the candidate the
+        sequential attempts would have sent if they had generated the same ones.
+        """
+        transcript = self.transcript.render(messages)
+        if supports_n(self.model, self.provider):
+            res = completion(**self.request(messages), n=self.max_attempts)
+            candidates = [choice.message for choice in res.choices]
+            self.total_cost += res._hidden_params["response_cost"] or 0
+        else:
+            responses = run_in_parallel(
+                [lambda: completion(**self.request(messages))] * self.max_attempts
+            )
+            candidates = [res.choices[0].message for res in responses]
+            self.total_cost += sum(
+                res._hidden_params["response_cost"] or 0 for res in responses
+            )
+        accepted = run_in_parallel(
+            [
+                # binds each candidate to its own call
+                lambda candidate=candidate: verify(
+                    self.model,
+                    self.provider,
+                    candidate,
+                    messages,
+                    transcript=transcript,
+                )
+                for candidate in candidates
+            ]
+        )
+        for candidate, is_accepted in zip(candidates, accepted):
+            if is_accepted:
+                self.messages.append(candidate.model_dump())
+                return candidate.content
+        return candidates[-1].content
+
+    async def agenerate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        return await asyncio.to_thread(self.generate_next_message, messages)
+
+
+def run_in_parallel(calls: List[Callable[[], T]]) -> List[T]:
+    # each call runs in a copy of the caller's context, so LLM calls are still
+    # attributed to the running episode
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, call) for call in calls
         ]
-        return self.generate_next_message(self.messages)
-
-    def step(self, content: str) -> str:
-        self.messages.append({"role": "user", "content": content})
-        return self.generate_next_message(self.messages)
-
-    def get_total_cost(self) -> float:
-        return self.total_cost
+        return [future.result() for future in futures]
 
 
 def map_role_label(role: str) -> str:
@@ -203,15 +263,75 @@ def map_role_label(role: str) -> str:
         return role.capitalize()
 
 
+class TranscriptBuffer(object):
+    """The transcript of a conversation for the supervisor prompts, one line per message.
+
+    Lines are only formatted for the messages appended since the last render, as
+    long as the messages start with the ones rendered before. With `max_tokens`,
+    the transcript is cut to the first message, which holds the instruction, and
+    the latest messages that fit in about `max_tokens` tokens, so prompts stop
+    growing with the conversation.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None) -> None:
+        self.max_tokens = max_tokens
+        self.clear()
+
+    def clear(self) -> None:
+        self.lines: List[str] = []
+        self.tokens: List[int] = []
+        self.last_message: Optional[Dict[str, Any]] = None
+        self.text: Optional[str] = None
+
+    def sync(self, messages: List[Dict[str, Any]]) -> None:
+        num_lines = len(self.lines)
+        if num_lines > 0 and (
+            len(messages) < num_lines
+            or messages[num_lines - 1] is not self.last_message
+        ):
+            # the conversation was reset or rewritten
+            self.clear()
+            num_lines = 0
+        for message in messages[num_lines:]:
+            line = f"{map_role_label(message['role'])}: {message['content']}"
+            self.lines.append(line)
+            self.tokens.append(len(line) // CHARS_PER_TOKEN + 1)
+            self.text = None
+        if messages:
+            self.last_message = messages[-1]
+
+    def render(self, messages: List[Dict[str, Any]]) -> str:
+        self.sync(messages)
+        if self.text is None:
+            self.text = self.window()
+        return self.text
+
+    def window(self) -> str:
+        if self.max_tokens is None or len(self.lines) <= 2:
+            return "\n".join(self.lines)
+        budget = self.max_tokens - self.tokens[0]
+        start = len(self.lines)
+        # the latest message is always kept
+        while start > 1 and (
+            start == len(self.lines) or self.tokens[start - 1] <= budget
+        ):
+            start -= 1
+            budget -= self.tokens[start]
+        if start == 1:
+            return "\n".join(self.lines)
+        omitted = f"[{start - 1} earlier messages omitted]"
+        return "\n".join([self.lines[0], omitted] + self.lines[start:])
+
+
 def verify(
-    model: str, provider: str, response: str, messages: List[Dict[str, Any]]
+    model: str,
+    provider: str,
+    response: str,
+    messages: List[Dict[str, Any]],
+    transcript: Optional[str] = None,
 ) -> bool:
-    transcript = "\n".join(
-        [
-            f"{map_role_label(message['role'])}: {message['content']}"
-            for message in messages
-        ]
-    )
+    if transcript is None:
+        transcript = TranscriptBuffer().render(messages)
     prompt = f"""You are a supervisor of the Agent in the conversation. You are given a Transcript of a conversation between a Customer and an Agent. The Customer has generated a Response, and you need to verify if it is satisfactory (true) or not (false).
 Your answer will be parsed, so do not include any other text than the classification (true or false).
     
@@ -225,6 +345,7 @@ Your answer will be parsed, so do not include any other text than the classifica
 
 Classification:"""
     res = completion(
+        role=Role.VERIFIER,
         model=model,
         custom_llm_provider=provider,
         messages=[{"role": "user", "content": prompt}],
@@ -233,14 +354,14 @@ Classification:"""
 
 
 def reflect(
-    model: str, provider: str, response: str, messages: List[Dict[str, Any]]
+    model: str,
+    provider: str,
+    response: str,
+    messages: List[Dict[str, Any]],
+    transcript: Optional[str] = None,
 ) -> str:
-    transcript = "\n".join(
-        [
-            f"{map_role_label(message['role'])}: {message['content']}"
-            for message in messages
-        ]
-    )
+    if transcript is None:
+        transcript = TranscriptBuffer().render(messages)
     prompt = f"""You are a supervisor of the Agent in the conversation. You are given a Transcript of a conversation between a (simulated) Customer and an Agent. The Customer generated a Response that was marked as unsatisfactory by you.
 You need to generate a Reflection on what went wrong in the conversation, and propose a new Response that should fix the issues.
 Your answer will be parsed, so do not include any other text than the classification (true or false).
@@ -259,6 +380,7 @@ Reflection:
 Response:
 <the response (this will be parsed and sent to the agent)>"""
     res = completion(
+        role=Role.REFLECTOR,
         model=model,
         custom_llm_provider=provider,
         messages=[{"role": "user", "content": prompt}],
@@ -268,45 +390,54 @@ Response:
 
 
 class ReflectionUserSimulationEnv(LLMUserSimulationEnv):
-    def __init__(self, model: str, provider: str, max_attempts: int = 2) -> None:
-        self.model = model
-        self.provider = provider
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        max_attempts: int = 2,
+        transcript_tokens: Optional[int] = None,
+    ) -> None:
+        super().__init__(model=model, provider=provider)
         self.max_attempts = max_attempts
-        self.reset()
+        self.transcript = TranscriptBuffer(max_tokens=transcript_tokens)
 
     def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
         cur_messages = messages.copy()
         initial_response = super().generate_next_message(cur_messages)
-        if verify(self.model, self.provider, initial_response, cur_messages):
+        transcript = self.transcript.render(cur_messages)
+        if verify(
+            self.model,
+            self.provider,
+            initial_response,
+            cur_messages,
+            transcript=transcript,
+        ):
             return initial_response
         attempts = 1
         while attempts < self.max_attempts:
             new_message = reflect(
-                self.model, self.provider, initial_response, cur_messages
+                self.model,
+                self.provider,
+                initial_response,
+                cur_messages,
+                transcript=transcript,
             )
             cur_messages.append({"role": "user", "content": new_message})
             new_response = super().generate_next_message(cur_messages)
-            if verify(self.model, self.provider, new_response, cur_messages):
+            transcript = self.transcript.render(cur_messages)
+            if verify(
+                self.model,
+                self.provider,
+                new_response,
+                cur_messages,
+                transcript=transcript,
+            ):
                 return new_response
             attempts += 1
         return initial_response
 
-    def reset(self, instruction: Optional[str] = None) -> str:
-        self.messages = [
-            {
-                "role": "system",
-                "content": self.build_system_prompt(instruction=instruction),
-            },
-            {"role": "user", "content": "Hi! How can I help you today?"},
-        ]
-        return self.generate_next_message(self.messages)
-
-    def step(self, content: str) -> str:
-        self.messages.append({"role": "user", "content": content})
-        return self.generate_next_message(self.messages)
-
-    def get_total_cost(self) -> float:
-        return self.total_cost
+    async def agenerate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        return await asyncio.to_thread(self.generate_next_message, messages)
 
 
 class UserStrategy(enum.Enum):
@@ -321,9 +452,21 @@ def load_user(
     user_strategy: Union[str, UserStrategy],
     model: Optional[str] = "gpt-4o",
     provider: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
 ) -> BaseUserSimulationEnv:
+    """Loads the user simulator of a strategy.
+
+    `options` are passed to the constructor of the simulator, and only the `verify`
+    and `reflection` strategies take any (`max_attempts` and `transcript_tokens`, and
+    `parallel_candidates` for `verify`).
+    """
     if isinstance(user_strategy, str):
         user_strategy = UserStrategy(user_strategy)
+    options = options or {}
+    if options and user_strategy not in [UserStrategy.VERIFY, UserStrategy.REFLECTION]:
+        raise ValueError(
+            f"The {user_strategy.value} user strategy does not take options {sorted(options)}"
+        )
     if user_strategy == UserStrategy.HUMAN:
         return HumanUserSimulationEnv()
     elif user_strategy == UserStrategy.LLM:
@@ -343,11 +486,11 @@ def load_user(
             raise ValueError("Verify user strategy requires a model")
         if provider is None:
             raise ValueError("Verify user strategy requires a model provider")
-        return VerifyUserSimulationEnv(model=model, provider=provider)
+        return VerifyUserSimulationEnv(model=model, provider=provider, **options)
     elif user_strategy == UserStrategy.REFLECTION:
         if model is None:
             raise ValueError("Reflection user strategy requires a model")
         if provider is None:
             raise ValueError("Reflection user strategy requires a model provider")
-        return ReflectionUserSimulationEnv(model=model, provider=provider)
+        return ReflectionUserSimulationEnv(model=model, provider=provider, **options)
     raise ValueError(f"Unknown user strategy {user_strategy}")
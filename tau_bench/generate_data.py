@@ -0,0 +1,428 @@
+# Copyright Sierra
+
+import argparse
+import importlib
+import json
+import os
+import random
+import string
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from tau_bench.envs.compiled_data import (
+    DATA_DIR_ENV_VAR,
+    compile_tables,
+    load_json_tables,
+)
+from tau_bench.envs.snapshot import DataSnapshot, copy_record
+
+ENVS = ["retail", "airline", "healthcare"]
+# ids that airline book_reservation hands out, so generated reservations must not take them
+RESERVED_RESERVATION_IDS = {"HATHAT", "HATHAU", "HATHAV"}
+
+
+class IdFactory(object):
+    """Draws random ids in the formats of the shipped data, unique among the ids already in use."""
+
+    def __init__(self, rng: random.Random, used: Set[str]) -> None:
+        self.rng = rng
+        self.used = used
+
+    def draw(self, make: Callable[[], str]) -> str:
+        while True:
+            new_id = make()
+            if new_id not in self.used:
+                self.used.add(new_id)
+                return new_id
+
+    def digits(self, prefix: str, length: int) -> str:
+        return self.draw(
+            lambda: prefix + "".join(self.rng.choices(string.digits, k=length))
+        )
+
+    def chars(self, length: int) -> str:
+        alphabet = string.ascii_uppercase + string.digits
+        return self.draw(lambda: "".join(self.rng.choices(alphabet, k=length)))
+
+
+class Identities(object):
+    """Draws names, addresses and emails for cloned users.
+
+    Names and addresses are recombined from the shipped users, and zip codes keep
+    the first three digits of the address they come from. No two users share a
+    (first name, last name, zip) or an email, so lookups by either stay unique.
+    """
+
+    def __init__(self, rng: random.Random, users: Dict[str, Any]) -> None:
+        self.rng = rng
+        self.first_names = sorted(set(u["name"]["first_name"] for u in users.values()))
+        self.last_names = sorted(set(u["name"]["last_name"] for u in users.values()))
+        self.addresses = [u["address"] for u in users.values()]
+        self.name_zips: Set[Tuple[str, str, str]] = set(
+            (
+                u["name"]["first_name"].lower(),
+                u["name"]["last_name"].lower(),
+                u["address"]["zip"],
+            )
+            for u in users.values()
+        )
+        self.ids = IdFactory(rng, set(users))
+        self.emails = IdFactory(rng, set(u["email"].lower() for u in users.values()))
+
+    def draw(self) -> Tuple[str, Dict[str, str], Dict[str, Any], str]:
+        """Returns a new user id, name, address and email."""
+        while True:
+            first_name = self.rng.choice(self.first_names)
+            last_name = self.rng.choice(self.last_names)
+            address = dict(self.rng.choice(self.addresses))
+            address["zip"] = address["zip"][:3] + "".join(
+                self.rng.choices(string.digits, k=len(address["zip"]) - 3)
+            )
+            name_zip = (first_name.lower(), last_name.lower(), address["zip"])
+            if name_zip not in self.name_zips:
+                self.name_zips.add(name_zip)
+                break
+        prefix = f"{first_name.lower()}_{last_name.lower()}_"
+        user_id = self.ids.digits(prefix, 4)
+        prefix = f"{first_name.lower()}.{last_name.lower()}"
+        email = self.emails.draw(
+            lambda: prefix
+            + "".join(self.rng.choices(string.digits, k=4))
+            + "@example.com"
+        )
+        name = {"first_name": first_name, "last_name": last_name}
+        return user_id, name, address, email
+
+
+def clone_payment_methods(
+    payment_methods: Dict[str, Any], ids: IdFactory
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    cloned, id_map = {}, {}
+    for payment_id, method in payment_methods.items():
+        new_id = ids.digits(method["source"] + "_", 7)
+        id_map[payment_id] = new_id
+        cloned[new_id] = dict(method, id=new_id)
+    return cloned, id_map
+
+
+def generate_retail(
+    tables: Dict[str, Any], scale: int, rng: random.Random
+) -> Dict[str, Any]:
+    users, orders, products = tables["users"], tables["orders"], tables["products"]
+    new_users, new_orders, new_products = dict(users), dict(orders), dict(products)
+    identities = Identities(rng, users)
+    order_ids = IdFactory(rng, set(orders))
+    product_ids = IdFactory(
+        rng,
+        set(products)
+        | set(item_id for p in products.values() for item_id in p["variants"]),
+    )
+    payment_ids = IdFactory(
+        rng, set(pid for u in users.values() for pid in u["payment_methods"])
+    )
+    tracking_ids = IdFactory(
+        rng,
+        set(
+            tracking_id
+            for o in orders.values()
+            for f in o["fulfillments"]
+            for tracking_id in f["tracking_id"]
+        ),
+    )
+    for copy in range(1, scale):
+        product_map, item_map = {}, {}
+        for product_id, product in products.items():
+            new_product_id = product_ids.digits("", len(product_id))
+            product_map[product_id] = new_product_id
+            variants = {}
+            for item_id, variant in product["variants"].items():
+                new_item_id = item_map[item_id] = product_ids.digits("", len(item_id))
+                variants[new_item_id] = dict(copy_record(variant), item_id=new_item_id)
+            new_products[new_product_id] = {
+                # product types are listed by name, so the copies need their own
+                "name": f"{product['name']} {copy + 1}",
+                "product_id": new_product_id,
+                "variants": variants,
+            }
+
+        order_map = {
+            order_id: order_ids.digits("#W", len(order_id) - 2) for order_id in orders
+        }
+        user_map, payment_maps = {}, {}
+        for user_id, user in users.items():
+            new_user_id, name, address, email = identities.draw()
+            payment_methods, payment_maps[user_id] = clone_payment_methods(
+                user["payment_methods"], payment_ids
+            )
+            user_map[user_id] = new_user_id
+            new_users[new_user_id] = {
+                "name": name,
+                "address": address,
+                "email": email,
+                "payment_methods": payment_methods,
+                "orders": [order_map[order_id] for order_id in user["orders"]],
+            }
+
+        for order_id, order in orders.items():
+            new_order = copy_record(order)
+            new_order["order_id"] = order_map[order_id]
+            new_order["user_id"] = user_map[order["user_id"]]
+            if order["address"] == users[order["user_id"]]["address"]:
+                new_order["address"] = dict(new_users[new_order["user_id"]]["address"])
+            for item in new_order["items"]:
+                item["name"] = new_products[product_map[item["product_id"]]]["name"]
+                item["product_id"] = product_map[item["product_id"]]
+                item["item_id"] = item_map[item["item_id"]]
+            for fulfillment in new_order["fulfillments"]:
+                fulfillment["tracking_id"] = [
+                    tracking_ids.digits("", len(tracking_id))
+                    for tracking_id in fulfillment["tracking_id"]
+                ]
+                fulfillment["item_ids"] = [
+                    item_map[item_id] for item_id in fulfillment["item_ids"]
+                ]
+            payment_map = payment_maps[order["user_id"]]
+            for payment in new_order["payment_history"]:
+                payment["payment_method_id"] = payment_map[payment["payment_method_id"]]
+            new_orders[new_order["order_id"]] = new_order
+    return {"orders": new_orders, "products": new_products, "users": new_users}
+
+
+def generate_airline(
+    tables: Dict[str, Any], scale: int, rng: random.Random
+) -> Dict[str, Any]:
+    users, flights = tables["users"], tables["flights"]
+    reservations = tables["reservations"]
+    new_users, new_flights = dict(users), dict(flights)
+    new_reservations = dict(reservations)
+    identities = Identities(rng, users)
+    reservation_ids = IdFactory(rng, set(reservations) | RESERVED_RESERVATION_IDS)
+    payment_ids = IdFactory(
+        rng, set(pid for u in users.values() for pid in u["payment_methods"])
+    )
+    prefix = next(iter(flights)).rstrip(string.digits)
+    next_number = max(int(number[len(prefix) :]) for number in flights) + 1
+    for _ in range(1, scale):
+        flight_map = {}
+        for flight_number, flight in flights.items():
+            new_number = flight_map[flight_number] = f"{prefix}{next_number:03d}"
+            next_number += 1
+            new_flights[new_number] = dict(
+                copy_record(flight), flight_number=new_number
+            )
+
+        reservation_map = {
+            reservation_id: reservation_ids.chars(len(reservation_id))
+            for reservation_id in reservations
+        }
+        user_map, payment_maps, names = {}, {}, {}
+        for user_id, user in users.items():
+            new_user_id, name, address, email = identities.draw()
+            payment_methods, payment_maps[user_id] = clone_payment_methods(
+                user["payment_methods"], payment_ids
+            )
+            user_map[user_id] = new_user_id
+            names[user_id] = name
+            new_users[new_user_id] = {
+                "name": name,
+                "address": address,
+                "email": email,
+                "dob": user["dob"],
+                "payment_methods": payment_methods,
+                "saved_passengers": copy_record(user["saved_passengers"]),
+                "membership": user["membership"],
+                "reservations": [
+                    reservation_map[reservation_id]
+                    for reservation_id in user["reservations"]
+                ],
+            }
+
+        for reservation_id, reservation in reservations.items():
+            user_id = reservation["user_id"]
+            new_reservation = copy_record(reservation)
+            new_reservation["reservation_id"] = reservation_map[reservation_id]
+            new_reservation["user_id"] = user_map[user_id]
+            for flight in new_reservation["flights"]:
+                flight["flight_number"] = flight_map[flight["flight_number"]]
+            for passenger in new_reservation["passengers"]:
+                # the user usually travels on their own reservations
+                if (
+                    passenger["first_name"] == users[user_id]["name"]["first_name"]
+                    and passenger["last_name"] == users[user_id]["name"]["last_name"]
+                ):
+                    passenger.update(names[user_id])
+            for payment in new_reservation["payment_history"]:
+                payment["payment_id"] = payment_maps[user_id][payment["payment_id"]]
+            new_reservations[new_reservation["reservation_id"]] = new_reservation
+    return {
+        "flights": new_flights,
+        "reservations": new_reservations,
+        "users": new_users,
+    }
+
+
+def generate_healthcare(
+    tables: Dict[str, Any], scale: int, rng: random.Random
+) -> Dict[str, Any]:
+    # ids are numbered in order because schedule_appointment numbers new appointments by count
+    patients, appointments = tables["patients"], tables["appointments"]
+    test_results = tables["test_results"]
+    new_tables = {
+        "patients": dict(patients),
+        "appointments": dict(appointments),
+        "test_results": dict(test_results),
+    }
+    first_names = sorted(set(p["name"].split(" ")[0] for p in patients.values()))
+    last_names = sorted(set(p["name"].split(" ")[-1] for p in patients.values()))
+
+    def numbering(table: Dict[str, Any]) -> Tuple[str, int]:
+        prefix = next(iter(table)).rstrip(string.digits)
+        return prefix, max(int(key[len(prefix) :]) for key in table)
+
+    counters = {name: numbering(table) for name, table in tables.items() if table}
+
+    def next_key(table_name: str) -> str:
+        prefix, number = counters[table_name]
+        counters[table_name] = (prefix, number + 1)
+        return f"{prefix}{number + 1:03d}"
+
+    for _ in range(1, scale):
+        patient_map = {}
+        for patient_id, patient in patients.items():
+            new_patient_id = patient_map[patient_id] = next_key("patients")
+            first_name = rng.choice(first_names)
+            last_name = rng.choice(last_names)
+            # the number of the patient keeps the email unique
+            number = new_patient_id.lstrip(string.ascii_letters)
+            new_tables["patients"][new_patient_id] = dict(
+                patient,
+                name=f"{first_name} {last_name}",
+                phone="555-" + "".join(rng.choices(string.digits, k=4)),
+                email=f"{first_name.lower()}.{last_name.lower()}{number}@email.com",
+            )
+        for table_name, table in [
+            ("appointments", appointments),
+            ("test_results", test_results),
+        ]:
+            for record in table.values():
+                new_tables[table_name][next_key(table_name)] = dict(
+                    record, patient_id=patient_map[record["patient_id"]]
+                )
+    return new_tables
+
+
+GENERATORS: Dict[
+    str, Callable[[Dict[str, Any], int, random.Random], Dict[str, Any]]
+] = {
+    "retail": generate_retail,
+    "airline": generate_airline,
+    "healthcare": generate_healthcare,
+}
+
+
+def validate_tasks(
+    env_name: str, shipped_tables: Dict[str, Any], tables: Dict[str, Any]
+) -> List[str]:
+    """Replays the ground truth actions of the test tasks on `tables`.
+
+    Returns one error per action that fails on `tables` but not on `shipped_tables`.
+    """
+    from tau_bench.envs import get_env
+
+    env = get_env(
+        env_name,
+        user_strategy="human",
+        user_model="",
+        task_split="test",
+        task_index=0,
+    )
+    shipped_snapshot, snapshot = DataSnapshot(shipped_tables), DataSnapshot(tables)
+
+    def run(data: Dict[str, Any], name: str, kwargs: Dict[str, Any]) -> Any:
+        try:
+            return env.tools_map[name].invoke(data=data, **kwargs)
+        except Exception as e:
+            return f"Error: {e}"
+
+    errors = []
+    for task_index, task in enumerate(env.tasks):
+        shipped, generated = shipped_snapshot.fork(), snapshot.fork()
+        for action in task.actions:
+            if action.name not in env.tools_map:
+                continue
+            expected = run(shipped, action.name, action.kwargs)
+            observation = run(generated, action.name, action.kwargs)
+            if str(observation).startswith("Error") and not str(expected).startswith(
+                "Error"
+            ):
+                errors.append(f"task {task_index} {action.name}: {observation}")
+    return errors
+
+
+def write_tables(
+    folder: str, table_files: Dict[str, str], tables: Dict[str, Any]
+) -> None:
+    os.makedirs(folder, exist_ok=True)
+    for table_name, file_name in table_files.items():
+        with open(os.path.join(folder, file_name), "w") as f:
+            # dumps encodes in C, while dump streams through the pure Python encoder
+            f.write(json.dumps(tables[table_name]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"Generate larger databases by cloning the shipped ones, for use with {DATA_DIR_ENV_VAR}"
+    )
+    parser.add_argument("--env", type=str, nargs="+", choices=ENVS, default=ENVS)
+    parser.add_argument(
+        "--scale",
+        type=int,
+        required=True,
+        help="Number of copies of each record; the first copy is the shipped data",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        required=True,
+        help=f"Writes one folder per env, to point {DATA_DIR_ENV_VAR} at",
+    )
+    parser.add_argument("--seed", type=int, default=10)
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Also compile each database, as tau_bench.compile_data does",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Check that the ground truth actions of the test tasks still run",
+    )
+    args = parser.parse_args()
+    assert args.scale >= 1, "Scale must be at least 1"
+
+    failed = False
+    for env_name in args.env:
+        data_module = importlib.import_module(f"tau_bench.envs.{env_name}.data")
+        shipped_tables = load_json_tables(
+            data_module.FOLDER_PATH, data_module.TABLE_FILES
+        )
+        tables = GENERATORS[env_name](
+            shipped_tables, args.scale, random.Random(args.seed)
+        )
+        folder = os.path.join(args.output_dir, env_name)
+        write_tables(folder, data_module.TABLE_FILES, tables)
+        if args.compile:
+            compile_tables(folder, data_module.TABLE_FILES)
+        sizes = ", ".join(f"{len(table)} {name}" for name, table in tables.items())
+        print(f"Generated {env_name} data with {sizes} in {folder}")
+        if args.validate:
+            errors = validate_tasks(env_name, shipped_tables, tables)
+            for error in errors:
+                print(f"  {error}")
+            print(f"  {len(errors)} task actions fail only on the generated data")
+            failed = failed or bool(errors)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+# Copyright Sierra
+
+import contextlib
+import contextvars
+import enum
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import litellm
+from litellm import ModelResponse
+
+
+class TransportMode(enum.Enum):
+    # call the provider
+    LIVE = "live"
+    # call the provider and save every request and response to the store
+    RECORD = "record"
+    # serve the responses saved by a recorded run, without network
+    REPLAY = "replay"
+
+
+class Role(enum.Enum):
+    AGENT = "agent"
+    USER = "user"
+    VERIFIER = "verifier"
+    REFLECTOR = "reflector"
+
+
+# the roles that simulate the user, whose costs make up the user cost of an episode
+USER_ROLES = [Role.USER, Role.VERIFIER, Role.REFLECTOR]
+
+
+class ReplayMissError(Exception):
+    pass
+
+
+DEFAULT_CACHE_SIZE_MB = 1024
+
+
+class UsageLedger(object):
+    """Calls, tokens, cost and latency of the LLM calls of one episode, by role."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.usage: Dict[str, Dict[str, float]] = {}
+
+    def record(self, role: Role, response: ModelResponse, latency: float) -> None:
+        usage = getattr(response, "usage", None)
+        cost = response._hidden_params.get("response_cost") or 0.0
+        with self.lock:
+            totals = self.usage.setdefault(
+                role.value,
+                {
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                    "latency_s": 0.0,
+                },
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            totals["cost"] += cost
+            totals["latency_s"] += latency
+
+    def cost(self, roles: List[Role]) -> float:
+        with self.lock:
+            return sum(
+                self.usage[role.value]["cost"]
+                for role in roles
+                if role.value in self.usage
+            )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {role: dict(totals) for role, totals in self.usage.items()}
+
+
+# the (task, trial) of the running episode, so that replays of a request that
+# was sent more than once get back the responses of the same episode
+current_episode: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_episode", default=None
+)
+current_ledger: contextvars.ContextVar[Optional[UsageLedger]] = contextvars.ContextVar(
+    "current_ledger", default=None
+)
+
+
+@contextlib.contextmanager
+def episode_scope(task_id: int, trial: int) -> Iterator[UsageLedger]:
+    """Attributes the LLM calls made in this context to an episode, and records their usage."""
+    ledger = UsageLedger()
+    episode_token = current_episode.set(f"{task_id}:{trial}")
+    ledger_token = current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        current_ledger.reset(ledger_token)
+        current_episode.reset(episode_token)
+
+
+@functools.lru_cache(maxsize=None)
+def supports_n(model: str, provider: Optional[str]) -> bool:
+    """Whether the provider returns `n` choices for one request."""
+    params = litellm.get_supported_openai_params(
+        model=model, custom_llm_provider=provider
+    )
+    return params is not None and "n" in params
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        kwargs, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseStore(object):
+    """Responses of the LLM calls of recorded runs, addressed by a hash of the request.
+
+    Each request has a JSONL file under `<path>/<key[:2]>/<key>.jsonl` with one
+    line per time it was sent, and the episode that sent it. A line is written
+    with a single append, so threads and worker processes can record to the
+    same store.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self.served: Dict[Tuple[Optional[str], str], int] = {}
+
+    def file_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.jsonl")
+
+    def append(self, key: str, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        path = self.file_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def load(self, key: str) -> List[Dict[str, Any]]:
+        entries = self.entries.get(key)
+        if entries is None:
+            try:
+                with open(self.file_path(key), encoding="utf-8") as f:
+                    # a line cut short by a killed recording is dropped
+                    entries = [json.loads(line) for line in f if line.endswith("\n")]
+            except FileNotFoundError:
+                entries = []
+            self.entries[key] = entries
+        return entries
+
+    def next_entry(self, key: str, episode: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The next recorded response to a request, preferring those recorded by the same episode.
+
+        A request sent more times than it was recorded cycles through its responses.
+        """
+        with self.lock:
+            entries = self.load(key)
+            if not entries:
+                return None
+            candidates = [entry for entry in entries if entry["episode"] == episode]
+            if not candidates:
+                candidates = entries
+            n = self.served.get((episode, key), 0)
+            self.served[(episode, key)] = n + 1
+            return candidates[n % len(candidates)]
+
+
+class ResponseCache(object):
+    """Responses to temperature 0 requests, shared across runs in a SQLite file.
+
+    Entries are addressed like the store, by a hash of the request, and the
+    least recently used ones are evicted once the entries add up to more than
+    `max_bytes`. Threads share one connection and processes share the file.
+    The size of the entries is kept as a running total next to them, so writes
+    don't add up the whole table.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self.connection = sqlite3.connect(
+            path, timeout=60.0, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, entry TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS total_size (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)"
+        )
+        if self.connection.execute("SELECT 1 FROM total_size").fetchone() is None:
+            # files written before the total was kept are counted once
+            self.connection.execute(
+                "INSERT OR IGNORE INTO total_size SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT entry FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        text = json.dumps(entry, ensure_ascii=False)
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, text, size, time.time()),
+                )
+                self.connection.execute(
+                    "UPDATE total_size SET size = size + ?",
+                    (size - (row[0] if row is not None else 0),),
+                )
+                (total,) = self.connection.execute(
+                    "SELECT size FROM total_size"
+                ).fetchone()
+                if total > self.max_bytes:
+                    self.evict(total)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def evict(self, total: int) -> None:
+        evicted = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ):
+            evicted.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.connection.execute("UPDATE total_size SET size = ?", (total,))
+
+
+def dump_response(response: ModelResponse, model: Optional[str]) -> Dict[str, Any]:
+    return {
+        "episode": current_episode.get(),
+        "model": model,
+        "response": response.model_dump(),
+        # stored responses that are stored again keep their original cost
+        "response_cost": response._hidden_params.get(
+            "recorded_cost", response._hidden_params.get("response_cost")
+        ),
+    }
+
+
+def load_response(entry: Dict[str, Any]) -> ModelResponse:
+    response = ModelResponse(**entry["response"])
+    # nothing is spent on a stored response, the original cost is kept for reference
+    response._hidden_params = {
+        "response_cost": 0.0,
+        "recorded_cost": entry["response_cost"],
+    }
+    return response
+
+
+class Transport(object):
+    """Sends the completion requests of agents and user simulators."""
+
+    def __init__(
+        self,
+        mode: TransportMode,
+        store: Optional[ResponseStore] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        assert (
+            mode == TransportMode.LIVE or store is not None
+        ), f"A store is required to {mode.value} LLM calls"
+        self.mode = mode
+        self.store = store
+        self.cache = cache
+
+    def is_cached(self, kwargs: Dict[str, Any]) -> bool:
+        # other temperatures sample a new response on every call, and so does the
+        # provider default when no temperature is passed
+        return (
+            self.cache is not None
+            and self.mode != TransportMode.REPLAY
+            and kwargs.get("temperature") == 0
+        )
+
+    def replay(self, key: str, kwargs: Dict[str, Any]) -> ModelResponse:
+        assert self.store is not None
+        entry = self.store.next_entry(key, current_episode.get())
+        if entry is None:
+            raise ReplayMissError(
+                f"No recorded response to the {kwargs.get('model')} request {key} in {self.store.path}"
+            )
+        return load_response(entry)
+
+    def lookup(self, key: str) -> Optional[ModelResponse]:
+        assert self.cache is not None
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        response = load_response(entry)
+        response._hidden_params["cache_hit"] = True
+        return response
+
+    def save(self, key: str, kwargs: Dict[str, Any], response: ModelResponse) -> None:
+        if self.cache is not None and self.is_cached(kwargs):
+            self.cache.put(key, dump_response(response, kwargs.get("model")))
+        self.record(key, kwargs, response)
+
+    def record(self, key: str, kwargs: Dict[str, Any], response: ModelResponse) -> None:
+        if self.mode == TransportMode.RECORD:
+            assert self.store is not None
+            self.store.append(key, dump_response(response, kwargs.get("model")))
+
+    def completion(self, **kwargs: Any) -> ModelResponse:
+        cached = self.is_cached(kwargs)
+        if self.mode == TransportMode.LIVE and not cached:
+            return litellm.completion(**kwargs)
+        # hashed before the call, since callers append to their messages afterwards
+        key = request_key(kwargs)
+        if self.mode == TransportMode.REPLAY:
+            return self.replay(key, kwargs)
+        response = self.lookup(key) if cached else None
+        if response is None:
+            response = litellm.completion(**kwargs)
+            self.save(key, kwargs, response)
+        else:
+            # recorded runs replay without the cache, so hits are recorded too
+            self.record(key, kwargs, response)
+        return response
+
+    async def acompletion(self, **kwargs: Any) -> ModelResponse:
+        cached = self.is_cached(kwargs)
+        if self.mode == TransportMode.LIVE and not cached:
+            return await litellm.acompletion(**kwargs)
+        key = request_key(kwargs)
+        if self.mode == TransportMode.REPLAY:
+            return self.replay(key, kwargs)
+        response = self.lookup(key) if cached else None
+        if response is None:
+            response = await litellm.acompletion(**kwargs)
+            self.save(key, kwargs, response)
+        else:
+            # recorded runs replay without the cache, so hits are recorded too
+            self.record(key, kwargs, response)
+        return response
+
+
+transport = Transport(TransportMode.LIVE)
+
+
+def set_transport(
+    mode: str,
+    store_path: Optional[str] = None,
+    cache_path: Optional[str] = None,
+    cache_size_mb: int = DEFAULT_CACHE_SIZE_MB,
+) -> Transport:
+    global transport
+    store = ResponseStore(store_path) if store_path is not None else None
+    cache = (
+        ResponseCache(cache_path, cache_size_mb * 1024 * 1024)
+        if cache_path is not None
+        else None
+    )
+    transport = Transport(TransportMode(mode), store, cache)
+    return transport
+
+
+def get_transport() -> Transport:
+    return transport
+
+
+def record_usage(role: Role, response: ModelResponse, latency: float) -> None:
+    ledger = current_ledger.get()
+    if ledger is not None:
+        ledger.record(role, response, latency)
+
+
+def completion(role: Role, **kwargs: Any) -> ModelResponse:
+    start = time.perf_counter()
+    response = transport.completion(**kwargs)
+    record_usage(role, response, time.perf_counter() - start)
+    return response
+
+
+async def acompletion(role: Role, **kwargs: Any) -> ModelResponse:
+    start = time.perf_counter()
+    response = await transport.acompletion(**kwargs)
+    record_usage(role, response, time.perf_counter() - start)
+    return response
@@ -0,0 +1,33 @@
+# Copyright Sierra
+
+import contextlib
+import contextvars
+import random
+from types import ModuleType
+from typing import Iterator, Optional, Union
+
+current_rng: contextvars.ContextVar[Optional[random.Random]] = contextvars.ContextVar(
+    "current_rng", default=None
+)
+
+
+def episode_seed(seed: int, idx: int, trial: int) -> str:
+    return f"{seed}:{trial}:{idx}"
+
+
+@contextlib.contextmanager
+def episode_rng(seed: int, idx: int, trial: int) -> Iterator[random.Random]:
+    """Gives the episode its own generator, so its draws don't depend on the episodes running next to it."""
+    rng = random.Random(episode_seed(seed, idx, trial))
+    token = current_rng.set(rng)
+    try:
+        yield rng
+    finally:
+        current_rng.reset(token)
+
+
+def get_rng() -> Union[random.Random, ModuleType]:
+    rng = current_rng.get()
+    # outside of an episode, draws come from the global generator, which the
+    # `random` module exposes with the same methods
+    return rng if rng is not None else random
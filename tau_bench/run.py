@@ -1,22 +1,35 @@
 # Copyright Sierra
 
+import asyncio
 import os
 import json
 import random
 import traceback
 from math import comb
-import multiprocessing
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
-from tau_bench.envs import get_env
+from tau_bench.checkpoint import (
+    CheckpointWriter,
+    check_resume_config,
+    export_results,
+    is_error,
+    latest_results,
+    read_checkpoint,
+    write_checkpoint_config,
+)
+from tau_bench.envs.pool import EnvPool
+from tau_bench.llm import episode_scope, get_transport, set_transport
+from tau_bench.rng import episode_rng
 from tau_bench.agents.base import Agent
 from tau_bench.types import EnvRunResult, RunConfig
 from litellm import provider_list
 from tau_bench.envs.user import UserStrategy
 from tau_bench.validate_environments import validate_environment
 
+T = TypeVar("T")
+
 
 def run(config: RunConfig) -> List[EnvRunResult]:
     assert config.env in ["retail", "airline", "healthcare"], "Only retail, airline, and healthcare envs are supported"
@@ -25,6 +38,16 @@ def run(config: RunConfig) -> List[EnvRunResult]:
     assert config.agent_strategy in ["tool-calling", "act", "react", "few-shot"], "Invalid agent strategy"
     assert config.task_split in ["train", "test", "dev"], "Invalid task split"
     assert config.user_strategy in [item.value for item in UserStrategy], "Invalid user strategy"
+    assert config.runner in ["thread", "async"], "Invalid runner"
+    assert config.workers >= 1, "Invalid number of workers"
+    assert config.resume is None or config.resume.endswith(".jsonl"), "Only JSONL checkpoints can be resumed"
+    assert config.resume is None or os.path.exists(config.resume), f"Checkpoint to resume {config.resume} does not exist"
+    if config.resume is not None:
+        check_resume_config(config.resume, config)
+    assert config.llm_transport in ["live", "record", "replay"], "Invalid LLM transport"
+    assert config.user_transcript_tokens is None or config.user_strategy in ["verify", "reflection"], "Only the verify and reflection user strategies have a transcript"
+    assert not config.user_parallel_candidates or config.user_strategy == "verify", "Only the verify user strategy has parallel candidates"
+    assert config.llm_transport == "live" or config.llm_store is not None, "An LLM store is required to record or replay"
 
     # Validate environment before running tests
     print(f"\n🔍 Validating {config.env} environment before model testing...")
@@ -37,20 +60,43 @@ def run(config: RunConfig) -> List[EnvRunResult]:
     
     print(f"✅ {config.env.capitalize()} environment validation passed! Proceeding with model testing...\n")
 
+    set_transport(
+        config.llm_transport,
+        config.llm_store,
+        config.llm_cache,
+        config.llm_cache_size_mb,
+    )
     random.seed(config.seed)
     time_str = datetime.now().strftime("%m%d%H%M%S")
-    ckpt_path = f"{config.log_dir}/{config.agent_strategy}-{config.model.split('/')[-1]}-{config.temperature}_range_{config.start_index}-{config.end_index}_user-{config.user_model}-{config.user_strategy}_{time_str}.json"
+    if config.resume is not None:
+        ckpt_path = config.resume
+    else:
+        ckpt_path = f"{config.log_dir}/{config.agent_strategy}-{config.model.split('/')[-1]}-{config.temperature}_range_{config.start_index}-{config.end_index}_user-{config.user_model}-{config.user_strategy}_{time_str}.jsonl"
     if not os.path.exists(config.log_dir):
         os.makedirs(config.log_dir)
+    if config.resume is not None:
+        previous_results = latest_results(read_checkpoint(ckpt_path))
+    else:
+        previous_results = []
+        write_checkpoint_config(ckpt_path, config)
+    # failed episodes are run again
+    finished = set(
+        (result.task_id, result.trial)
+        for result in previous_results
+        if not is_error(result)
+    )
 
     print(f"Loading user with strategy: {config.user_strategy}")
-    env = get_env(
+    env_pool = EnvPool(
         config.env,
         user_strategy=config.user_strategy,
         user_model=config.user_model,
         user_provider=config.user_model_provider,
         task_split=config.task_split,
+        user_options=user_options(config),
     )
+    env = env_pool.acquire()
+    env_pool.release(env)
     agent = agent_factory(
         tools_info=env.tools_info,
         wiki=env.wiki,
@@ -59,14 +105,37 @@ def run(config: RunConfig) -> List[EnvRunResult]:
     end_index = (
         len(env.tasks) if config.end_index == -1 else min(config.end_index, len(env.tasks))
     )
-    results: List[EnvRunResult] = []
-    lock = multiprocessing.Lock()
+    results: List[EnvRunResult] = list(previous_results)
+    writer = CheckpointWriter(ckpt_path, fsync=config.checkpoint_fsync)
     if config.task_ids and len(config.task_ids) > 0:
         print(f"Running tasks {config.task_ids} (checkpoint path: {ckpt_path})")
     else:
         print(
             f"Running tasks {config.start_index} to {end_index} (checkpoint path: {ckpt_path})"
     )
+    if previous_results:
+        print(
+            f"Resuming from {len(finished)} finished results, retrying {len(previous_results) - len(finished)} failed ones"
+        )
+    loop = None
+    if config.runner == "async" and config.workers == 1:
+        # one event loop for the whole run, so async clients are reused across trials
+        loop = asyncio.new_event_loop()
+        # agents and user simulators without a native async implementation fall back
+        # to the default executor, so size it like the thread runner
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=config.max_concurrency))
+
+    def _finish(result: EnvRunResult) -> EnvRunResult:
+        print(
+            "✅" if result.reward == 1 else "❌",
+            f"task_id={result.task_id}",
+            result.info,
+        )
+        print("-----")
+        writer.write(result)
+        return result
+
+    pairs: List[Tuple[int, int]] = []
     for i in range(config.num_trials):
         if config.task_ids and len(config.task_ids) > 0:
             idxs = config.task_ids
@@ -74,63 +143,131 @@ def run(config: RunConfig) -> List[EnvRunResult]:
             idxs = list(range(config.start_index, end_index))
         if config.shuffle:
             random.shuffle(idxs)
+        idxs = [idx for idx in idxs if (idx, i) not in finished]
+        if config.workers > 1:
+            pairs.extend((idx, i) for idx in idxs)
+            continue
 
         def _run(idx: int) -> EnvRunResult:
-            isolated_env = get_env(
-                config.env,
-                user_strategy=config.user_strategy,
-                user_model=config.user_model,
-                task_split=config.task_split,
-                user_provider=config.user_model_provider,
-                task_index=idx,
+            return _finish(run_episode(agent, env_pool, idx, i, config.seed))
+
+        async def _arun(idx: int) -> EnvRunResult:
+            return _finish(await arun_episode(agent, env_pool, idx, i, config.seed))
+
+        if config.runner == "async":
+            res = loop.run_until_complete(
+                run_concurrently(_arun, idxs, config.max_concurrency)
             )
+            results.extend(res)
+        else:
+            with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+                res = list(executor.map(_run, idxs))
+                results.extend(res)
+    if config.workers > 1:
+        from tau_bench.workers import run_sharded
+
+        results.extend(run_sharded(config, pairs, on_result=_finish))
+    if loop is not None:
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+    writer.close()
+    # retries replace the failed results they were run for
+    results = latest_results(results)
+
+    display_metrics(results)
+    cache = get_transport().cache
+    if cache is not None:
+        print(f"💾 LLM cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
+
+    print(f"\n📄 Results saved to {ckpt_path}\n")
+    if config.export_json:
+        export_path = os.path.splitext(ckpt_path)[0] + ".json"
+        export_results(results, export_path)
+        print(f"📄 Results exported to {export_path}\n")
+    return results
+
 
-            print(f"Running task {idx}")
-            try:
+def user_options(config: RunConfig) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if config.user_transcript_tokens is not None:
+        options["transcript_tokens"] = config.user_transcript_tokens
+    if config.user_parallel_candidates:
+        options["parallel_candidates"] = True
+    return options
+
+
+def error_result(idx: int, trial: int, e: Exception) -> EnvRunResult:
+    return EnvRunResult(
+        task_id=idx,
+        reward=0.0,
+        info={"error": str(e), "traceback": traceback.format_exc()},
+        traj=[],
+        trial=trial,
+    )
+
+
+def run_episode(
+    agent: Agent, env_pool: EnvPool, idx: int, trial: int, seed: int
+) -> EnvRunResult:
+    print(f"Running task {idx}")
+    with episode_scope(idx, trial) as ledger, episode_rng(seed, idx, trial):
+        try:
+            with env_pool.checkout(task_index=idx) as isolated_env:
                 res = agent.solve(
                     env=isolated_env,
                     task_index=idx,
                 )
-                result = EnvRunResult(
-                    task_id=idx,
-                    reward=res.reward,
-                    info=res.info,
-                    traj=res.messages,
-                    trial=i,
-                )
-            except Exception as e:
-                result = EnvRunResult(
-                    task_id=idx,
-                    reward=0.0,
-                    info={"error": str(e), "traceback": traceback.format_exc()},
-                    traj=[],
-                    trial=i,
+            result = EnvRunResult(
+                task_id=idx,
+                reward=res.reward,
+                info=res.info,
+                traj=res.messages,
+                trial=trial,
+            )
+        except Exception as e:
+            result = error_result(idx, trial, e)
+    # failed episodes also report the calls they made
+    result.usage = ledger.summary()
+    return result
+
+
+async def arun_episode(
+    agent: Agent, env_pool: EnvPool, idx: int, trial: int, seed: int
+) -> EnvRunResult:
+    print(f"Running task {idx}")
+    with episode_scope(idx, trial) as ledger, episode_rng(seed, idx, trial):
+        try:
+            with env_pool.checkout(task_index=idx) as isolated_env:
+                res = await agent.asolve(
+                    env=isolated_env,
+                    task_index=idx,
                 )
-            print(
-                "✅" if result.reward == 1 else "❌",
-                f"task_id={idx}",
-                result.info,
+            result = EnvRunResult(
+                task_id=idx,
+                reward=res.reward,
+                info=res.info,
+                traj=res.messages,
+                trial=trial,
             )
-            print("-----")
-            with lock:
-                data = []
-                if os.path.exists(ckpt_path):
-                    with open(ckpt_path, "r") as f:
-                        data = json.load(f)
-                with open(ckpt_path, "w") as f:
-                    json.dump(data + [result.model_dump()], f, indent=2)
-            return result
-
-        with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
-            res = list(executor.map(_run, idxs))
-            results.extend(res)
+        except Exception as e:
+            result = error_result(idx, trial, e)
+    # failed episodes also report the calls they made
+    result.usage = ledger.summary()
+    return result
 
-    display_metrics(results)
 
-    with open(ckpt_path, "w") as f:
-        json.dump([result.model_dump() for result in results], f, indent=2)
-        print(f"\n📄 Results saved to {ckpt_path}\n")
-    return results
+async def run_concurrently(
+    run_item: Callable[[T], Awaitable[EnvRunResult]],
+    items: List[T],
+    max_concurrency: int,
+) -> List[EnvRunResult]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run_limited(item: T) -> EnvRunResult:
+        async with semaphore:
+            return await run_item(item)
+
+    return await asyncio.gather(*[_run_limited(item) for item in items])
 
 
 def agent_factory(
@@ -213,3 +350,27 @@ def display_metrics(results: List[EnvRunResult]) -> None:
     print("📈 Pass^k")
     for k, pass_hat_k in pass_hat_ks.items():
         print(f"  k={k}: {pass_hat_k}")
+    display_usage(results)
+
+
+def display_usage(results: List[EnvRunResult]) -> None:
+    # results of checkpoints written before usage was recorded have none
+    usages = [r.usage for r in results if r.usage is not None]
+    if not usages:
+        return
+    totals: Dict[str, Dict[str, float]] = {}
+    for usage in usages:
+        for role, stats in usage.items():
+            role_totals = totals.setdefault(role, {})
+            for name, value in stats.items():
+                role_totals[name] = role_totals.get(name, 0) + value
+    print(f"💰 LLM usage over {len(usages)} episodes")
+    print(
+        f"  {'role':10} {'calls':>8} {'prompt tokens':>14} {'completion tokens':>18} {'cost ($)':>10} {'latency (s)':>12}"
+    )
+    for role, stats in sorted(totals.items()):
+        print(
+            f"  {role:10} {stats['calls']:8.0f} {stats['prompt_tokens']:14.0f} {stats['completion_tokens']:18.0f} {stats['cost']:10.4f} {stats['latency_s']:12.1f}"
+        )
+    total_cost = sum(stats["cost"] for stats in totals.values())
+    print(f"  Total cost: ${total_cost:.4f} (${total_cost / len(usages):.4f} per episode)")
@@ -47,6 +47,9 @@ class EnvInfo(BaseModel):
     source: Optional[str] = None
     user_cost: Optional[float] = None
     reward_info: Optional[RewardResult] = None
+    # read-only tool calls of the episode so far answered from and missing the memo
+    memo_hits: Optional[int] = None
+    memo_misses: Optional[int] = None
 
 
 class EnvResponse(BaseModel):
@@ -67,6 +70,8 @@ class EnvRunResult(BaseModel):
     info: Dict[str, Any]
     traj: List[Dict[str, Any]]
     trial: int
+    # calls, tokens, cost and latency of the LLM calls of the episode, by role
+    usage: Optional[Dict[str, Dict[str, float]]] = None
 
 
 class RunConfig(BaseModel):
@@ -88,3 +93,14 @@ class RunConfig(BaseModel):
     shuffle: int = 0
     user_strategy: str = "llm"
     few_shot_displays_path: Optional[str] = None
+    checkpoint_fsync: str = "never"
+    export_json: bool = False
+    resume: Optional[str] = None
+    runner: str = "thread"
+    workers: int = 1
+    llm_transport: str = "live"
+    llm_store: Optional[str] = None
+    llm_cache: Optional[str] = None
+    llm_cache_size_mb: int = 1024
+    user_transcript_tokens: Optional[int] = None
+    user_parallel_candidates: bool = False
@@ -0,0 +1,139 @@
+# Copyright Sierra
+
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Set, Tuple
+
+from tau_bench.envs.pool import EnvPool
+from tau_bench.llm import get_transport, set_transport
+from tau_bench.types import EnvRunResult, RunConfig
+
+Pair = Tuple[int, int]
+
+
+def run_worker(
+    config: RunConfig, worker_index: int, pairs: List[Pair], results: Any
+) -> None:
+    """Runs a shard of (task, trial) pairs in a worker process, streaming results to the parent."""
+    from tau_bench.run import (
+        agent_factory,
+        arun_episode,
+        run_concurrently,
+        run_episode,
+        user_options,
+    )
+
+    # spawned workers start with the default transport
+    set_transport(
+        config.llm_transport,
+        config.llm_store,
+        config.llm_cache,
+        config.llm_cache_size_mb,
+    )
+    env_pool = EnvPool(
+        config.env,
+        user_strategy=config.user_strategy,
+        user_model=config.user_model,
+        user_provider=config.user_model_provider,
+        task_split=config.task_split,
+        user_options=user_options(config),
+    )
+    env = env_pool.acquire()
+    env_pool.release(env)
+    agent = agent_factory(tools_info=env.tools_info, wiki=env.wiki, config=config)
+
+    def _run(pair: Pair) -> EnvRunResult:
+        idx, trial = pair
+        result = run_episode(agent, env_pool, idx, trial, config.seed)
+        results.put(("result", result.model_dump()))
+        return result
+
+    async def _arun(pair: Pair) -> EnvRunResult:
+        idx, trial = pair
+        result = await arun_episode(agent, env_pool, idx, trial, config.seed)
+        results.put(("result", result.model_dump()))
+        return result
+
+    if config.runner == "async":
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=config.max_concurrency)
+        )
+        loop.run_until_complete(run_concurrently(_arun, pairs, config.max_concurrency))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+    else:
+        with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+            list(executor.map(_run, pairs))
+    cache = get_transport().cache
+    if cache is not None:
+        results.put(("cache", (cache.hits, cache.misses)))
+    results.put(("done", worker_index))
+
+
+def run_sharded(
+    config: RunConfig,
+    pairs: List[Pair],
+    on_result: Callable[[EnvRunResult], EnvRunResult],
+) -> List[EnvRunResult]:
+    """Runs (task, trial) pairs over `config.workers` processes.
+
+    Pairs are dealt round-robin, and every worker loads its own copy of the
+    domain data and runs its shard with `config.max_concurrency` concurrent
+    episodes. Results are passed to `on_result` in the parent as they arrive.
+    A worker that dies records an error result for each pair it did not finish.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results_queue = ctx.Queue()
+    shards = [pairs[i :: config.workers] for i in range(config.workers)]
+    shards = [shard for shard in shards if shard]
+    processes = [
+        ctx.Process(target=run_worker, args=(config, i, shard, results_queue))
+        for i, shard in enumerate(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    results: List[EnvRunResult] = []
+    done: Set[Pair] = set()
+    finished_workers: Set[int] = set()
+    while len(finished_workers) < len(processes):
+        try:
+            kind, payload = results_queue.get(timeout=1.0)
+        except queue.Empty:
+            # the queue is drained, so a worker that has exited without saying so crashed
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    finished_workers.add(i)
+            continue
+        if kind == "done":
+            finished_workers.add(payload)
+        elif kind == "cache":
+            # the parent reports the hits and misses of the whole run
+            cache = get_transport().cache
+            if cache is not None:
+                cache.hits += payload[0]
+                cache.misses += payload[1]
+        else:
+            result = on_result(EnvRunResult(**payload))
+            done.add((result.task_id, result.trial))
+            results.append(result)
+    for process in processes:
+        process.join()
+
+    for shard, process in zip(shards, processes):
+        if process.exitcode == 0:
+            continue
+        for idx, trial in shard:
+            if (idx, trial) not in done:
+                result = EnvRunResult(
+                    task_id=idx,
+                    reward=0.0,
+                    info={"error": f"Worker exited with code {process.exitcode}"},
+                    traj=[],
+                    trial=trial,
+                )
+                results.append(on_result(result))
+    return results
@@ -0,0 +1,58 @@
+# Copyright Sierra
+
+import asyncio
+import os
+
+# litellm otherwise fetches its cost map on import
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import pytest
+
+from tau_bench.bench.stub_llm import start_stub_server
+from tau_bench.envs import get_env
+from tau_bench.run import agent_factory
+from tau_bench.types import RunConfig
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    base_url, server = start_stub_server(latency=0.0, turns=3)
+    yield base_url
+    server.kill()
+
+
+@pytest.fixture
+def stub_env(stub_server, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_BASE", stub_server)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+
+
+@pytest.mark.parametrize(
+    "agent_strategy,user_strategy",
+    [("tool-calling", "llm"), ("react", "llm"), ("react", "react")],
+)
+def test_asolve_matches_solve(stub_env, agent_strategy, user_strategy):
+    config = RunConfig(
+        model_provider="openai",
+        user_model_provider="openai",
+        model="gpt-4o",
+        env="retail",
+        agent_strategy=agent_strategy,
+        user_strategy=user_strategy,
+    )
+    env = get_env(
+        "retail",
+        user_strategy=user_strategy,
+        user_model="gpt-4o",
+        user_provider="openai",
+        task_split="test",
+        task_index=0,
+    )
+    agent = agent_factory(tools_info=env.tools_info, wiki=env.wiki, config=config)
+
+    expected = agent.solve(env, task_index=0)
+    result = asyncio.run(agent.asolve(env, task_index=0))
+
+    assert result.messages == expected.messages
+    assert result.reward == expected.reward
+    assert len(result.messages) > 2